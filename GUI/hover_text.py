@@ -299,5 +299,21 @@ def get_hover_descriptions() -> dict[str, str]:
 						contain sound effects from the Cutscene files. If you disallow it then your project will only be
 						from the WZSound.
                 </div>
+        """,
+
+        "combo_index_mode": """
+                <div style='font-size:14pt;'>Index Files</div>
+                <div>
+                        Chooses how the WZSound is unpacked the next time it is extracted. Write Index Files puts every Index file
+						in IndexesSD/IndexesHD. Keep Index Files Virtual only records where each one sits inside the WZSound, which
+						saves disk space. Switching back to Write Index Files writes out any that are still virtual.
+                </div>
+        """,
+
+        "button_materialize_indexes": """
+                <div style='font-size:14pt;'>Write Index Files to Disk</div>
+                <div>
+                        Writes every virtual Index file in IndexesSD/IndexesHD to disk, e.g. to open them in BrawlCrate.
+                </div>
         """
     }
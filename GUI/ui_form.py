@@ -260,6 +260,23 @@ class Ui_WZSPI_MainWindow(object):
 
         self.verticalLayout_4.addWidget(self.combo_allow_cutscene)
 
+        self.horizontal_index_mode = QHBoxLayout()
+        self.horizontal_index_mode.setObjectName(u"horizontal_index_mode")
+        self.combo_index_mode = QComboBox(self.frame)
+        self.combo_index_mode.addItem("")
+        self.combo_index_mode.addItem("")
+        self.combo_index_mode.setObjectName(u"combo_index_mode")
+
+        self.horizontal_index_mode.addWidget(self.combo_index_mode)
+
+        self.button_materialize_indexes = QPushButton(self.frame)
+        self.button_materialize_indexes.setObjectName(u"button_materialize_indexes")
+
+        self.horizontal_index_mode.addWidget(self.button_materialize_indexes)
+
+
+        self.verticalLayout_4.addLayout(self.horizontal_index_mode)
+
 
         self.vertical_create.addWidget(self.frame)
 
@@ -437,6 +454,10 @@ class Ui_WZSPI_MainWindow(object):
         self.combo_allow_cutscene.setItemText(0, QCoreApplication.translate("WZSPI_MainWindow", u"Allow Cutscene Instructions", None))
         self.combo_allow_cutscene.setItemText(1, QCoreApplication.translate("WZSPI_MainWindow", u"Disallow Cutscene Instructions", None))
 
+        self.combo_index_mode.setItemText(0, QCoreApplication.translate("WZSPI_MainWindow", u"Write Index Files", None))
+        self.combo_index_mode.setItemText(1, QCoreApplication.translate("WZSPI_MainWindow", u"Keep Index Files Virtual", None))
+
+        self.button_materialize_indexes.setText(QCoreApplication.translate("WZSPI_MainWindow", u"Write Index Files to Disk", None))
         self.button_create_brwsd.setText(QCoreApplication.translate("WZSPI_MainWindow", u"Create SD Project BRWSD", None))
         self.button_load_brwsd_folder.setText(QCoreApplication.translate("WZSPI_MainWindow", u"Load Project Folder", None))
         self.label_description_brwsd.setHtml(QCoreApplication.translate("WZSPI_MainWindow", u"<!DOCTYPE HTML PUBLIC \"-//W3C//DTD HTML 4.0//EN\" \"http://www.w3.org/TR/REC-html40/strict.dtd\">\n"
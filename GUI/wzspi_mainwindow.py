@@ -68,17 +68,41 @@ except ImportError:
                 raise ImportError("Could not import Ui_Dialog_Progress from ui_progress or GUI.ui_progress") from e
 
 try:
-        from rwav_extract import setup_extraction, setup_extraction_converted, setup_extraction_HD
+        from rwav_extract import setup_extraction, run_extraction
 except ImportError as e:
         print("failed to import rwav_extract")
         pass
 
 try:
-        from rwar_extract import extract_rwar_files, remove_duplicate_files
+        from rwar_extract import extract_rwar_files
 except ImportError as e:
         print("failed to import rwar_extract")
         pass
 
+try:
+        from brsar_parser import list_rwavs
+except ImportError as e:
+        print("failed to import brsar_parser")
+        pass
+
+try:
+        from rwar_catalog import load_catalog, get_source_archives, archives_by_file, rwav_offsets_in_source, list_virtual_archives, read_archive, archive_matches_file, materialize_index_files, read_virtual_indexes_flag, write_virtual_indexes_flag
+except ImportError as e:
+        print("failed to import rwar_catalog")
+        pass
+
+try:
+        from progress_reporter import as_reporter
+except ImportError as e:
+        print("failed to import progress_reporter")
+        pass
+
+try:
+        from cutscene_ingest import ingest_cutscenes, find_brsar_files
+except ImportError as e:
+        print("failed to import cutscene_ingest")
+        pass
+
 try:
         from brwsd_creator import build_brwsd_from_unmodified_rwavs
 except ImportError as e:
@@ -120,6 +144,7 @@ EXPECTED_SD_HASH = "917b19ae47307be10ecb894fdc77b5e03aeae390748449cee5663099b340
 EXPECTED_HD_HASH = "6e4b9ad376df1d815326aa4e3d44de47872e3ebac57aee95cf28956a8a1ae960"
 
 ALLOW_CUTSCENES = True
+
 IS_PROJECT_LOADED = False
 IS_CUTSCENE_FOLDER_CREATED = False
 IS_HD_CUTSCENE_FOLDER_CREATED = False
@@ -132,31 +157,12 @@ def is_valid_filename(name):
 def extract_differences_and_create_instruction(
     modified_folder, original_folder, output_directory, instruction_filename
 ):
-        def read_rwav_values(file_path):
-                with open(file_path, "rb") as f:
-                        data = f.read()
-
-                index = 0
-                values = []
-
-                while index < len(data):
-                        index = data.find(b"RWAV", index)
-                        if index == -1 or index + 12 > len(data):
-                                break
-
-                        # Read the 4 bytes at offset 0x8 from RWAV
-                        value = data[index + 8:index + 12]
-                        values.append(value)
-
-                        # Skip this RWAV chunk (move forward by 12 at least)
-                        index += 12
-
-                return values
-
-        def compare_rwav_values(modified_path, original_path):
-                modified_values = read_rwav_values(modified_path)
-                original_values = read_rwav_values(original_path)
+        def read_rwav_values(data):
+                # RWAV size fields (offset 0x8 of each RWAV), same values the catalog records
+                entries, _ = list_rwavs(data)
+                return [size_field for _, size_field, _ in entries]
 
+        def compare_rwav_values(modified_values, original_values):
                 diffs = []
                 for i, (m, o) in enumerate(zip(modified_values, original_values)):
                         if m != o:
@@ -164,23 +170,64 @@ def extract_differences_and_create_instruction(
 
                 return diffs
 
-        instruction_data = {}
+        def cataloged_archive(archives, virtual_archives, folder, file_name):
+                # Only trust the catalog while it still describes the file on disk
+                path = os.path.join(folder, file_name)
+                if not os.path.isfile(path):
+                        return virtual_archives[file_name][1] if file_name in virtual_archives else None
+                archive = archives.get(file_name)
+                if archive and archive_matches_file(archive, path):
+                        return archive
+                return None
+
+        def read_index_file(virtual_archives, folder, file_name):
+                path = os.path.join(folder, file_name)
+                if os.path.isfile(path):
+                        with open(path, "rb") as f:
+                                return f.read()
+                return read_archive(*virtual_archives[file_name])
+
+        modified_catalog = load_catalog(modified_folder)
+        original_catalog = load_catalog(original_folder)
+        modified_archives = archives_by_file(modified_catalog)
+        original_archives = archives_by_file(original_catalog)
+        modified_virtual = list_virtual_archives(modified_catalog)
+        original_virtual = list_virtual_archives(original_catalog)
+
+        modified_names = [fn for fn in os.listdir(modified_folder) if fn.endswith(".brwsd")]
+        modified_names += [fn for fn in modified_virtual if fn not in modified_names]
 
-        for file_name in os.listdir(modified_folder):
-                if not file_name.endswith(".brwsd"):
-                        continue
+        instruction_data = {}
 
+        for file_name in modified_names:
                 original_path = os.path.join(original_folder, file_name)
-                modified_path = os.path.join(modified_folder, file_name)
 
-                if not os.path.exists(original_path):
+                if not os.path.exists(original_path) and file_name not in original_virtual:
                         continue
 
-                with open(original_path, "rb") as f1, open(modified_path, "rb") as f2:
-                        if f1.read() == f2.read():
+                modified_archive = cataloged_archive(modified_archives, modified_virtual, modified_folder, file_name)
+                original_archive = cataloged_archive(original_archives, original_virtual, original_folder, file_name)
+
+                if modified_archive and original_archive:
+                        if modified_archive["hash"] == original_archive["hash"]:
+                                continue
+
+                        # RWAV size fields straight from the catalogs
+                        diff_indices = compare_rwav_values(
+                                [rwav[1] for rwav in modified_archive["rwavs"]],
+                                [rwav[1] for rwav in original_archive["rwavs"]]
+                        )
+                else:
+                        original_data = read_index_file(original_virtual, original_folder, file_name)
+                        modified_data = read_index_file(modified_virtual, modified_folder, file_name)
+                        if original_data == modified_data:
                                 continue
 
-                diff_indices = compare_rwav_values(modified_path, original_path)
+                        diff_indices = compare_rwav_values(
+                                read_rwav_values(modified_data),
+                                read_rwav_values(original_data)
+                        )
+
                 if not diff_indices:
                         continue
 
@@ -274,6 +321,7 @@ class MissingBrsarDialog(QDialog):
 
                 self.program_data_dir = program_data_dir
                 self.wzsound_path = os.path.join(self.program_data_dir, 'WZSound.brsar')
+                self.file_hash = None  # SHA-256 of the supplied file, once one is picked
 
                 self.ui.button_error.clicked.connect(self.browse_file)
 
@@ -281,6 +329,7 @@ class MissingBrsarDialog(QDialog):
                 file_path, _ = QFileDialog.getOpenFileName(self, "Select SD WZSound.brsar", "", "BRSAR Files (*.brsar)")
                 if file_path:
                         file_hash = get_file_hash(file_path)
+                        self.file_hash = file_hash
                         print(f"File hash: {file_hash}")
 
                         #if file_hash != EXPECTED_SD_HASH:
@@ -324,7 +373,10 @@ class MissingBrsarDialog(QDialog):
                                         working_directory,
                                         target_folder="IndexesSD",
                                         progress_ui=progress_dialog.ui,
-                                        cancel_flag=cancel_flag
+                                        cancel_flag=cancel_flag,
+                                        virtual=read_virtual_indexes_flag(working_directory),
+                                        use_cache=True,
+                                        file_hash=file_hash
                                 )
 
                                 progress_dialog.close()
@@ -396,7 +448,10 @@ class MissingBrsarHDDialog(QDialog):
                                         working_directory,
                                         target_folder="IndexesHD",
                                         progress_ui=progress_dialog.ui,
-                                        cancel_flag=cancel_flag
+                                        cancel_flag=cancel_flag,
+                                        virtual=read_virtual_indexes_flag(working_directory),
+                                        use_cache=True,
+                                        file_hash=file_hash
                                 )
 
                                 progress_dialog.close()
@@ -588,6 +643,12 @@ class WZSPI_MainWindow(QMainWindow):
                         self.on_allow_cutscene_changed
                 )
 
+                self.ui.combo_index_mode.blockSignals(True)
+                self.ui.combo_index_mode.setCurrentIndex(1 if read_virtual_indexes_flag(self.working_directory) else 0)
+                self.ui.combo_index_mode.blockSignals(False)
+                self.ui.combo_index_mode.currentIndexChanged.connect(self.on_index_mode_changed)
+                self.ui.button_materialize_indexes.clicked.connect(self.materialize_indexes)
+
 
 
                 # Set up the project name and disable buttons by default
@@ -693,6 +754,28 @@ class WZSPI_MainWindow(QMainWindow):
                 project_dir = os.path.join(self.working_directory, "Projects", self.project_name)
                 self.write_cutscenes_flag(project_dir, ALLOW_CUTSCENES)
 
+        def on_index_mode_changed(self, index: int):
+                virtual = (index == 1)
+                write_virtual_indexes_flag(self.working_directory, virtual)
+                if not virtual:
+                        # Switching back to Index files writes out whatever is still virtual
+                        self.materialize_indexes()
+
+        def materialize_indexes(self):
+                written = []
+                for folder_name in ("IndexesSD", "IndexesHD"):
+                        folder = os.path.join(self.working_directory, folder_name)
+                        if not os.path.isdir(folder):
+                                continue
+                        try:
+                                written += materialize_index_files(folder)
+                        except Exception as e:
+                                QMessageBox.critical(self, "Error", f"Failed to write Index files to {folder_name}:\n{e}")
+                                return
+
+                print(f"Wrote {len(written)} Index files to disk")
+                QMessageBox.information(self, "Index Files", f"Wrote {len(written)} Index files to disk.")
+
         def write_cutscenes_flag(self, base_folder: str, value: bool) -> None:
                 path = os.path.join(base_folder, "cutscene.txt")
                 with open(path, "w", encoding="utf-8") as f:
@@ -714,258 +797,51 @@ class WZSPI_MainWindow(QMainWindow):
                         return True
 
         def create_cutscenes(self):
-                # Folder picker
-                src_dir = QFileDialog.getExistingDirectory(
-                        self,
-                        "Select folder demo folder containing SD .brsar files",
-                        self.working_directory
-                )
-                if not src_dir:
-                        return
-
-                # Destinations
-                programdata_demo = os.path.join(self.working_directory, "ProgramData", "demo")
-                flat_out = os.path.join(self.working_directory, "IndexesSD")  # <- no /demo
-                temp_root = os.path.join(flat_out, "_tmp_extract")
-
-                os.makedirs(programdata_demo, exist_ok=True)
-                os.makedirs(flat_out, exist_ok=True)
-                os.makedirs(temp_root, exist_ok=True)
-
-                # Find .brsar files (recursive)
-                brsar_files = []
-                for root, _, files in os.walk(src_dir):
-                        for fn in files:
-                                if fn.lower().endswith(".brsar"):
-                                        brsar_files.append(os.path.join(root, fn))
-
-                if not brsar_files:
-                        QMessageBox.information(self, "No Files Found", "No .brsar files were found in that folder.")
-                        return
-
-                copied = 0
-                extracted = 0
-                moved = 0
-                errors = []
-
-                # ---- COPY PHASE ----
-                for src_path in brsar_files:
-                        try:
-                                dest_path = os.path.join(programdata_demo, os.path.basename(src_path))
-                                shutil.copy2(src_path, dest_path)
-                                copied += 1
-                        except Exception as e:
-                                errors.append(f"Copy failed: {os.path.basename(src_path)} → {e}")
-
-                # ---- EXTRACTION + FLATTEN PHASE ----
-                for fn in os.listdir(programdata_demo):
-                        if not fn.lower().endswith(".brsar"):
-                                continue
-
-                        brsar_path = os.path.join(programdata_demo, fn)
-                        brsar_stem = os.path.splitext(fn)[0]
-
-                        # Extract into temp subfolder
-                        temp_folder_rel = os.path.join("IndexesSD", "_tmp_extract", brsar_stem)  # <- no /demo
-                        temp_folder_abs = os.path.join(self.working_directory, temp_folder_rel)
-
-                        try:
-                                # Ensure clean temp folder
-                                if os.path.exists(temp_folder_abs):
-                                        shutil.rmtree(temp_folder_abs)
-                                os.makedirs(temp_folder_abs, exist_ok=True)
-
-                                extract_rwar_files(
-                                        brsar_path,
-                                        self.working_directory,
-                                        target_folder=temp_folder_rel
-                                )
-                                extracted += 1
-
-                                # Move extracted files into flat_out
-                                for out_name in os.listdir(temp_folder_abs):
-                                        src_out = os.path.join(temp_folder_abs, out_name)
-
-                                        if not os.path.isfile(src_out):
-                                                continue
-
-                                        # out_name example: "Index_025_621.brwsd"
-                                        out_stem, out_ext = os.path.splitext(out_name)
-
-                                        # Remove "Index_" prefix if present, keep the rest (e.g. "025_621")
-                                        if out_stem.startswith("Index_"):
-                                                out_stem = out_stem[len("Index_"):]
-
-                                        # Final name: "CutsceneA_025_621.brwsd"
-                                        flat_name = f"{brsar_stem}_{out_stem}{out_ext}"
-                                        dst_out = os.path.join(flat_out, flat_name)
-
-                                        # If exists, suffix
-                                        if os.path.exists(dst_out):
-                                                base, ext = os.path.splitext(flat_name)
-                                                n = 2
-                                                while True:
-                                                        alt = os.path.join(flat_out, f"{base}_{n}{ext}")
-                                                        if not os.path.exists(alt):
-                                                                dst_out = alt
-                                                                break
-                                                        n += 1
-
-                                        shutil.move(src_out, dst_out)
-                                        moved += 1
-
-                        except Exception as e:
-                                errors.append(f"Extract/flatten failed: {fn} → {e}")
-
-                # Cleanup temp
-                try:
-                        if os.path.exists(temp_root):
-                                shutil.rmtree(temp_root)
-                except Exception:
-                        pass
-
-                try:
-                        remove_duplicate_files(flat_out)
-                except Exception as e:
-                        errors.append(f"Duplicate cleanup failed → {e}")
-
-                msg = (
-                        f"Copied: {copied} .brsar file(s)\n"
-                        f"Extracted: {extracted} archive(s)\n"
-                        f"Flattened files moved: {moved}\n\n"
-                        f"Flat output folder:\n{flat_out}"
-                )
-
-                if errors:
-                        msg += "\n\nErrors:\n" + "\n".join(errors[:10])
-                        if len(errors) > 10:
-                                msg += f"\n...and {len(errors) - 10} more"
-
-                QMessageBox.information(self, "Cutscene Extraction Complete", msg)
-                self.update_cutscene_ui_state()
-
+                self._ingest_cutscene_folder("SD", "demo", "IndexesSD")
 
         def create_cutscenes_hd(self):
+                self._ingest_cutscene_folder("HD", "demoHD", "IndexesHD")
+
+        def _ingest_cutscene_folder(self, label, demo_folder, index_folder):
                 # Folder picker
                 src_dir = QFileDialog.getExistingDirectory(
                         self,
-                        "Select folder demo folder containing HD .brsar files",
+                        f"Select folder demo folder containing {label} .brsar files",
                         self.working_directory
                 )
                 if not src_dir:
                         return
 
-                # Destinations
-                programdata_demo = os.path.join(self.working_directory, "ProgramData", "demoHD")
-                flat_out = os.path.join(self.working_directory, "IndexesHD")  # <- no /demo
-                temp_root = os.path.join(flat_out, "_tmp_extract")
-
-                os.makedirs(programdata_demo, exist_ok=True)
-                os.makedirs(flat_out, exist_ok=True)
-                os.makedirs(temp_root, exist_ok=True)
-
-                # Find .brsar files (recursive)
-                brsar_files = []
-                for root, _, files in os.walk(src_dir):
-                        for fn in files:
-                                if fn.lower().endswith(".brsar"):
-                                        brsar_files.append(os.path.join(root, fn))
-
-                if not brsar_files:
+                if not find_brsar_files(src_dir):
                         QMessageBox.information(self, "No Files Found", "No .brsar files were found in that folder.")
                         return
 
-                copied = 0
-                extracted = 0
-                moved = 0
-                errors = []
-
-                # ---- COPY PHASE ----
-                for src_path in brsar_files:
-                        try:
-                                dest_path = os.path.join(programdata_demo, os.path.basename(src_path))
-                                shutil.copy2(src_path, dest_path)
-                                copied += 1
-                        except Exception as e:
-                                errors.append(f"Copy failed: {os.path.basename(src_path)} → {e}")
-
-                # ---- EXTRACTION + FLATTEN PHASE ----
-                for fn in os.listdir(programdata_demo):
-                        if not fn.lower().endswith(".brsar"):
-                                continue
-
-                        brsar_path = os.path.join(programdata_demo, fn)
-                        brsar_stem = os.path.splitext(fn)[0]
-
-                        # Extract into temp subfolder
-                        temp_folder_rel = os.path.join("IndexesHD", "_tmp_extract", brsar_stem)  # <- no /demo
-                        temp_folder_abs = os.path.join(self.working_directory, temp_folder_rel)
-
-                        try:
-                                # Ensure clean temp folder
-                                if os.path.exists(temp_folder_abs):
-                                        shutil.rmtree(temp_folder_abs)
-                                os.makedirs(temp_folder_abs, exist_ok=True)
-
-                                extract_rwar_files(
-                                        brsar_path,
-                                        self.working_directory,
-                                        target_folder=temp_folder_rel
-                                )
-                                extracted += 1
-
-                                # Move extracted files into flat_out
-                                for out_name in os.listdir(temp_folder_abs):
-                                        src_out = os.path.join(temp_folder_abs, out_name)
-
-                                        if not os.path.isfile(src_out):
-                                                continue
-
-                                        # out_name example: "Index_025_621.brwsd"
-                                        out_stem, out_ext = os.path.splitext(out_name)
-
-                                        # Remove "Index_" prefix if present, keep the rest (e.g. "025_621")
-                                        if out_stem.startswith("Index_"):
-                                                out_stem = out_stem[len("Index_"):]
-
-                                        # Final name: "CutsceneA_025_621.brwsd"
-                                        flat_name = f"{brsar_stem}_{out_stem}{out_ext}"
-                                        dst_out = os.path.join(flat_out, flat_name)
-
-                                        # If exists, suffix
-                                        if os.path.exists(dst_out):
-                                                base, ext = os.path.splitext(flat_name)
-                                                n = 2
-                                                while True:
-                                                        alt = os.path.join(flat_out, f"{base}_{n}{ext}")
-                                                        if not os.path.exists(alt):
-                                                                dst_out = alt
-                                                                break
-                                                        n += 1
-
-                                        shutil.move(src_out, dst_out)
-                                        moved += 1
-
-                        except Exception as e:
-                                errors.append(f"Extract/flatten failed: {fn} → {e}")
-
-                # Cleanup temp
-                try:
-                        if os.path.exists(temp_root):
-                                shutil.rmtree(temp_root)
-                except Exception:
-                        pass
+                progress_dialog = ProgressDialog(self, generated_text_message="Extracting cutscene RWAR files...")
+                progress_dialog.setWindowTitle("Extracting Cutscenes")
+                cancel_flag = {"cancelled": False}
+                progress_dialog.cancelled.connect(lambda: cancel_flag.update(cancelled=True))
+                progress_dialog.show()
+                QApplication.processEvents()
 
                 try:
-                        remove_duplicate_files(flat_out)
-                except Exception as e:
-                        errors.append(f"Duplicate cleanup failed → {e}")
+                        summary = ingest_cutscenes(
+                                self.working_directory,
+                                src_dir,
+                                demo_folder=demo_folder,
+                                index_folder=index_folder,
+                                progress_ui=progress_dialog.ui,
+                                cancel_flag=cancel_flag
+                        )
+                finally:
+                        progress_dialog.close()
 
+                errors = summary["errors"]
                 msg = (
-                        f"Copied: {copied} .brsar file(s)\n"
-                        f"Extracted: {extracted} archive(s)\n"
-                        f"Flattened files moved: {moved}\n\n"
-                        f"Flat output folder:\n{flat_out}"
+                        f"Copied: {summary['copied']} .brsar file(s)\n"
+                        f"Unchanged (skipped): {summary['skipped']} .brsar file(s)\n"
+                        f"Extracted: {summary['extracted']} archive(s)\n"
+                        f"Index files written: {summary['written']}\n\n"
+                        f"Flat output folder:\n{summary['output']}"
                 )
 
                 if errors:
@@ -977,7 +853,6 @@ class WZSPI_MainWindow(QMainWindow):
                 self.update_cutscene_ui_state()
 
 
-
         def on_yaml_focus_in(self, event):
                 self.is_editing_yaml = True
                 self.ui.description_text.setHtml(self.hover_descriptions["text_yaml_edit"])
@@ -1119,17 +994,11 @@ class WZSPI_MainWindow(QMainWindow):
                         cancel_flag=cancel_flag
                 )
 
-                setup_extraction(
-                        self.working_directory,
-                        project_name,
-                        allow_cutscenes=allow_cutscenes,
-                        progress_ui=progress_dialog.ui,
-                        cancel_flag=cancel_flag
-                )
-
-                setup_extraction_converted(
+                # Originals and the converted project's RWAVs in one run
+                run_extraction(
                         self.working_directory,
                         project_name,
+                        ("sd", "converted"),
                         allow_cutscenes=allow_cutscenes,
                         progress_ui=progress_dialog.ui,
                         cancel_flag=cancel_flag
@@ -1234,7 +1103,6 @@ class WZSPI_MainWindow(QMainWindow):
                         print("[INFO] Instructions file not found.")
 
         def handle_patch_hd_click(self):
-                self.create_brwsd()
                 indexes_hd_path = os.path.join(self.working_directory, "IndexesHD")
 
                 # If IndexesHD missing, require HD WZSound and extract IndexesHD normally
@@ -1250,32 +1118,9 @@ class WZSPI_MainWindow(QMainWindow):
                 self.run_hd_patch()
 
         def run_hd_patch(self):
-                project_dir = os.path.join(self.working_directory, "Projects", self.project_name)
-                allow_cutscenes = self.read_cutscenes_flag(project_dir)
-
-                progress_dialog = ProgressDialog(
-                        self,
-                        generated_text_message="Extracting RWAV files (HD)..."
-                )
-                progress_dialog.setWindowTitle("Extracting (HD)")
-                cancel_flag = {'cancelled': False}
-                progress_dialog.cancelled.connect(lambda: cancel_flag.update(cancelled=True))
-
-                progress_dialog.show()
-                QApplication.processEvents()
-
-                project_name = self.project_name
-                setup_extraction_HD(
-                        self.working_directory,
-                        project_name,
-                        allow_cutscenes=allow_cutscenes,
-                        progress_ui=progress_dialog.ui,
-                        cancel_flag=cancel_flag
-                )
-
-                progress_dialog.close()
-
-                self.patch_hd_wzsound(self.working_directory, project_name)
+                # SD and HD RWAVs are extracted in the same run, so IndexesHD has to exist by now
+                self.create_brwsd(targets=("sd", "hd"))
+                self.patch_hd_wzsound(self.working_directory, self.project_name)
 
         def patch_hd_wzsound(self, working_directory, project_name):
                 # ---- PATHS ----
@@ -1353,7 +1198,15 @@ class WZSPI_MainWindow(QMainWindow):
                 # label -> {"path": str, "offsets": list[int]}
                 target_rwav_index: dict[str, dict] = {}
 
+                # RWAV offsets recorded when IndexesHD was extracted
+                hd_catalog = load_catalog(os.path.join(working_directory, "IndexesHD"))
+
                 for label, path in targets:
+                        archives = get_source_archives(hd_catalog, path)
+                        if archives is not None:
+                                target_rwav_index[label] = {"path": path, "offsets": rwav_offsets_in_source(archives)}
+                                continue
+
                         try:
                                 with open(path, "rb") as f:
                                         data = f.read()
@@ -1385,7 +1238,6 @@ class WZSPI_MainWindow(QMainWindow):
                         generated_text_message="Patching HD WZSound..."
                 )
                 progress_dialog.setWindowTitle("Patching HD WZSound")
-                progress_dialog.ui.progressBar.setMaximum(total_rwavs)
                 progress_dialog.ui.progressBar.setValue(0)
                 progress_dialog.show()
                 QApplication.processEvents()
@@ -1422,61 +1274,55 @@ class WZSPI_MainWindow(QMainWindow):
                 out_demo_dir = os.path.join(hd_output_folder, "demo")
                 wrote_any_demo = False
 
-                for label, path in targets:
-                        try:
-                                with open(path, "rb") as f:
-                                        data = bytearray(f.read())
-                        except Exception as e:
-                                print(f"[WARN] Could not read target for patching {label}: {e}")
-
-                                # Still advance progress for this target's headers
-                                step += len(target_rwav_index.get(label, {}).get("offsets", []))
-                                if hasattr(progress_dialog.ui, "progressBar"):
-                                        progress_dialog.ui.progressBar.setValue(step)
-                                QApplication.processEvents()
-                                continue
-
-                        changed = False
-                        offsets = target_rwav_index.get(label, {}).get("offsets", [])
-
-                        for off in offsets:
-                                if hasattr(progress_dialog.ui, "label_status"):
-                                        progress_dialog.ui.label_status.setText(f"{label} | RWAV @ 0x{off:X}")
-
-                                # Attempt patch at this RWAV header
-                                if try_patch_at_offset(data, off):
-                                        changed = True
-
-                                # Progress increments PER RWAV HEADER processed (match or not)
-                                step += 1
-                                if hasattr(progress_dialog.ui, "progressBar"):
-                                        progress_dialog.ui.progressBar.setValue(step)
-                                QApplication.processEvents()
-
-                        # ---- WRITE OUTPUT RULES ----
-                        if label == "WZSound.brsar":
-                                # Always output WZSound
-                                out_path = os.path.join(hd_output_folder, "WZSound.brsar")
+                with as_reporter(progress_dialog.ui) as reporter:
+                        for label, path in targets:
                                 try:
-                                        with open(out_path, "wb") as f:
-                                                f.write(data)
+                                        with open(path, "rb") as f:
+                                                data = bytearray(f.read())
                                 except Exception as e:
-                                        progress_dialog.close()
-                                        print(f"[ERROR] Could not write patched WZSound: {e}")
-                                        return
-                        else:
-                                # Demo: only write if changed
-                                if not changed:
+                                        print(f"[WARN] Could not read target for patching {label}: {e}")
+
+                                        # Still advance progress for this target's headers
+                                        step += len(target_rwav_index.get(label, {}).get("offsets", []))
+                                        reporter.update(step, total_rwavs)
                                         continue
 
-                                os.makedirs(out_demo_dir, exist_ok=True)
-                                out_path = os.path.join(out_demo_dir, label)
-                                try:
-                                        with open(out_path, "wb") as f:
-                                                f.write(data)
-                                        wrote_any_demo = True
-                                except Exception as e:
-                                        print(f"[ERROR] Could not write patched demo file {label}: {e}")
+                                changed = False
+                                offsets = target_rwav_index.get(label, {}).get("offsets", [])
+
+                                for off in offsets:
+                                        # Attempt patch at this RWAV header
+                                        if try_patch_at_offset(data, off):
+                                                changed = True
+
+                                        # Progress increments PER RWAV HEADER processed (match or not)
+                                        step += 1
+                                        reporter.update(step, total_rwavs, status=f"{label} | RWAV @ 0x{off:X}")
+
+                                # ---- WRITE OUTPUT RULES ----
+                                if label == "WZSound.brsar":
+                                        # Always output WZSound
+                                        out_path = os.path.join(hd_output_folder, "WZSound.brsar")
+                                        try:
+                                                with open(out_path, "wb") as f:
+                                                        f.write(data)
+                                        except Exception as e:
+                                                progress_dialog.close()
+                                                print(f"[ERROR] Could not write patched WZSound: {e}")
+                                                return
+                                else:
+                                        # Demo: only write if changed
+                                        if not changed:
+                                                continue
+
+                                        os.makedirs(out_demo_dir, exist_ok=True)
+                                        out_path = os.path.join(out_demo_dir, label)
+                                        try:
+                                                with open(out_path, "wb") as f:
+                                                        f.write(data)
+                                                wrote_any_demo = True
+                                        except Exception as e:
+                                                print(f"[ERROR] Could not write patched demo file {label}: {e}")
 
                 # Remove empty demo dir if nothing written
                 if not wrote_any_demo:
@@ -1813,7 +1659,7 @@ class WZSPI_MainWindow(QMainWindow):
                         QMessageBox.critical(self, "Save Failed", f"Could not save file:\n{e}")
                 self.ui.text_yaml_edit.setPlainText("")
 
-        def create_brwsd(self, keep_dialog=False):
+        def create_brwsd(self, keep_dialog=False, targets=("sd",)):
                 project_dir = os.path.join(self.working_directory, "Projects", self.project_name)
                 allow_cutscenes = self.read_cutscenes_flag(project_dir)
 
@@ -1831,9 +1677,10 @@ class WZSPI_MainWindow(QMainWindow):
                         cancel_flag=cancel_flag
                 )
 
-                setup_extraction(
+                run_extraction(
                         self.working_directory,
                         self.project_name,
+                        targets,
                         allow_cutscenes=allow_cutscenes,
                         progress_ui=progress_dialog.ui,
                         cancel_flag=cancel_flag
@@ -0,0 +1,212 @@
+import struct
+
+# BRSAR layout (all big-endian):
+#   RSAR header: 0x10 common header, then SYMB/INFO/FILE offset+size pairs
+#   INFO: 8 byte block header, then six 8 byte references (relative to INFO + 8)
+#         sounds, banks, players, files, groups, player info
+#   Group entry: name, id, ext path ref, header offset/size, wave offset/size, item table ref
+#   Group item: file id, header offset/size, wave offset/size (relative to group), reserved
+#
+# Every RWAR in the FILE section belongs to a group item, so walking the group
+# table gives exact offsets without scanning the file for the magic.
+#
+# RWAR layout (what brwsd_creator writes too):
+#   header: 0x10 common header, then TABL offset/size and DATA offset/size
+#   TABL: magic, size, count, then count * (01000000, offset, size)
+#         with offsets relative to the DATA block
+
+RSAR_MAGIC = b'RSAR'
+INFO_MAGIC = b'INFO'
+RWAR_MAGIC = b'RWAR'
+RWAV_MAGIC = b'RWAV'
+TABL_MAGIC = b'TABL'
+
+_INFO_GROUP_REF = 0x08 + 4 * 8
+
+def _read_ref(data, pos, base):
+	"""Reads an 8 byte data reference and returns its absolute address (or None)."""
+	ref_type, _, _, value = struct.unpack_from(">BBHI", data, pos)
+	if ref_type != 1:
+		return None
+	return base + value
+
+def _read_u32_list(data, pos, base):
+	"""Reads a counted table of references, returning absolute addresses."""
+	count = struct.unpack_from(">I", data, pos)[0]
+	if pos + 4 + count * 8 > len(data):
+		raise ValueError(f"Reference table at 0x{pos:X} runs past end of file")
+
+	addresses = []
+	for i in range(count):
+		address = _read_ref(data, pos + 4 + i * 8, base)
+		if address is not None:
+			addresses.append(address)
+	return addresses
+
+def read_rwar_size(data, offset):
+	"""Returns the size stored in the RWAR header at offset, or 0 if it doesn't fit."""
+	if offset + 12 > len(data) or data[offset:offset + 4] != RWAR_MAGIC:
+		return 0
+	size = struct.unpack_from(">I", data, offset + 8)[0]
+	if size < 0x20 or offset + size > len(data):
+		return 0
+	return size
+
+def list_rwars_from_info(data):
+	"""Lists (offset, size) of every RWAR using the BRSAR INFO group table.
+
+	Returns None if the buffer doesn't look like a BRSAR we can walk,
+	so the caller can fall back to scanning.
+	"""
+	try:
+		if len(data) < 0x40 or data[0:4] != RSAR_MAGIC:
+			return None
+
+		info_offset, info_size = struct.unpack_from(">II", data, 0x18)
+		if info_offset + info_size > len(data) or data[info_offset:info_offset + 4] != INFO_MAGIC:
+			return None
+
+		base = info_offset + 8
+		group_table = _read_ref(data, info_offset + _INFO_GROUP_REF, base)
+		if group_table is None:
+			return None
+
+		found = {}
+		for group in _read_u32_list(data, group_table, base):
+			wave_offset = struct.unpack_from(">I", data, group + 0x18)[0]
+			item_table = _read_ref(data, group + 0x20, base)
+			if item_table is None:
+				continue
+
+			for item in _read_u32_list(data, item_table, base):
+				item_wave_offset, item_wave_size = struct.unpack_from(">II", data, item + 0x0C)
+				if item_wave_size == 0:
+					continue
+
+				offset = wave_offset + item_wave_offset
+				size = read_rwar_size(data, offset)
+				if size:
+					# The same file can be listed by several groups at one offset
+					found[offset] = size
+	except struct.error:
+		return None
+
+	if not found:
+		return None
+
+	return sorted(found.items())
+
+def scan_rwars(data):
+	"""Fallback for files without a usable INFO table: one pass over the magic."""
+	found = []
+	index = 0
+	while True:
+		index = data.find(RWAR_MAGIC, index)
+		if index == -1:
+			break
+
+		size = read_rwar_size(data, index)
+		if not size:
+			index += 4
+			continue
+
+		found.append((index, size))
+		index += size
+
+	return found
+
+def locate_rwars(data):
+	"""Returns a sorted list of (offset, size) for every RWAR in a BRSAR buffer."""
+	entries = list_rwars_from_info(data)
+	if entries is None:
+		print("BRSAR INFO table not usable, scanning for RWAR headers instead")
+		entries = scan_rwars(data)
+	return entries
+
+def scan_rwavs(data, start=0, end=None):
+	"""Lists (offset, size field) for every RWAV header in data[start:end].
+
+	Offsets are relative to start. Headers too close to the end to hold a
+	size field are still listed (with size 0) so audio numbering stays stable.
+	"""
+	if end is None:
+		end = len(data)
+
+	found = []
+	pos = start
+	while True:
+		pos = data.find(RWAV_MAGIC, pos, end)
+		if pos == -1:
+			break
+
+		if pos + 12 > end:
+			found.append((pos - start, 0))
+		else:
+			found.append((pos - start, struct.unpack_from(">I", data, pos + 8)[0]))
+		pos += 4
+
+	return found
+
+def clamp_rwav_size(size_field, available):
+	"""Turns an RWAV size field into the number of bytes that can be sliced."""
+	# RWAV chunks are 16-byte aligned; discard impossible low nibble.
+	size = size_field & ~0xF
+	return min(size, available) if size > 0 else 0
+
+def parse_rwar_table(data, offset=0, end=None):
+	"""Lists (offset, size) of every RWAV using the TABL block of the RWAR at offset.
+
+	Offsets are relative to the RWAR. Returns None if the table doesn't
+	check out (bad magic, entries past end, entry not on an RWAV header),
+	so the caller can fall back to scanning.
+	"""
+	if end is None:
+		end = len(data)
+
+	try:
+		if data[offset:offset + 4] != RWAR_MAGIC:
+			return None
+
+		tabl_offset, _, data_offset = struct.unpack_from(">III", data, offset + 0x10)
+		tabl = offset + tabl_offset
+		if data[tabl:tabl + 4] != TABL_MAGIC:
+			return None
+
+		count = struct.unpack_from(">I", data, tabl + 8)[0]
+		if tabl + 0x0C + count * 12 > end:
+			return None
+
+		entries = []
+		for i in range(count):
+			rwav_offset, size = struct.unpack_from(">II", data, tabl + 0x0C + i * 12 + 4)
+			relative = data_offset + rwav_offset
+			start = offset + relative
+			if start + size > end or data[start:start + 4] != RWAV_MAGIC:
+				return None
+			entries.append((relative, size))
+	except struct.error:
+		return None
+
+	return entries
+
+def list_rwavs(data, offset=0, end=None):
+	"""Returns ([(offset, size field, size)], from_table) for the RWAR at data[offset:end].
+
+	size is the exact byte count when from_table is True. Otherwise the TABL
+	wasn't usable, the RWAVs were found by scan_rwavs and size is the
+	clamped header size, which may need normalizing.
+	"""
+	if end is None:
+		end = len(data)
+
+	table = parse_rwar_table(data, offset, end)
+	if table is not None:
+		return [
+			(relative, struct.unpack_from(">I", data, offset + relative + 8)[0] if size >= 12 else 0, size)
+			for relative, size in table
+		], True
+
+	return [
+		(relative, size_field, clamp_rwav_size(size_field, end - offset - relative))
+		for relative, size_field in scan_rwavs(data, offset, end)
+	], False
@@ -1,10 +1,14 @@
+import io
 import os
+import json
 import struct
-import shutil
 import re
 
 from PySide6.QtWidgets import QApplication
 
+from brsar_parser import parse_rwar_table
+from rwar_catalog import content_hash
+
 _AUDIO_LINE_RE = re.compile(r'^\s*Audio\[(\d+)\]\s*:\s*(.+?)\s*$')
 
 def pad_to_multiple_of(value, multiple):
@@ -52,112 +56,290 @@ def write_data_section(brwsd_file, rwav_total_size):
     brwsd_file.write(b'DATA')  # 0x0 to 0x3
     brwsd_file.write(struct.pack('>I', rwav_total_size))  # 0x4 to 0x7 (RWAV total size)
 
-def append_and_replace_base_blank(base_blank_file, original_file):
-    """Appends the original file's data to BaseBlankFile.brwsd and replaces the original."""
-    # First, copy the BaseBlankFile.brwsd to the folder where the combined file is
-    temp_base_blank = original_file + "_temp"
-    shutil.copy(base_blank_file, temp_base_blank)
-    
-    # Append original file's data to the temp copy of BaseBlankFile.brwsd
-    with open(temp_base_blank, 'ab') as blank_file:
-        with open(original_file, 'rb') as orig_file:
-            blank_file.write(orig_file.read())
-
-    # Delete the original combined file
-    os.remove(original_file)
+COPY_BUFFER_SIZE = 1024 * 1024
 
-    # Rename the temporary BaseBlankFile.brwsd to the original file name
-    os.rename(temp_base_blank, original_file)
+def _append_file(out_file, src_path):
+	"""Appends a whole file to out_file without pulling it into Python memory.
 
-def combine_rwav_files_to_brwsd(rwav_folder, mod_folder, output_file):
+	Uses os.copy_file_range or os.sendfile where the OS has them, and a
+	fixed-size buffer otherwise (e.g. on Windows, or across filesystems).
+	"""
+	# The kernel writes at the fd position, so anything still buffered has to go first
+	out_file.flush()
+
+	with open(src_path, 'rb', buffering=0) as src:
+		remaining = os.fstat(src.fileno()).st_size
+		try:
+			while remaining > 0:
+				if hasattr(os, "copy_file_range"):
+					copied = os.copy_file_range(src.fileno(), out_file.fileno(), remaining)
+				elif hasattr(os, "sendfile"):
+					copied = os.sendfile(out_file.fileno(), src.fileno(), None, remaining)
+				else:
+					break
+				if copied == 0:
+					break  # Source got shorter
+				remaining -= copied
+		except OSError:
+			pass  # Not supported here; both positions are where the kernel left off
+
+		# out_file may be unbuffered, where a write() can take less than it was given
+		while remaining > 0:
+			chunk = src.read(min(remaining, COPY_BUFFER_SIZE))
+			if not chunk:
+				break
+			remaining -= len(chunk)
+			with memoryview(chunk) as view:
+				while view:
+					view = view[out_file.write(view):]
+
+# Written next to the BRWSD by combine_rwav_files_to_brwsd:
+#   {"version": 2, "brwsd": [size, mtime_ns], "prefix": [size, mtime_ns] or null,
+#    "data_start": ..., "entries": [[name, source path, size, mtime_ns, md5], ...]}
+# data_start is where the first RWAV payload starts in the file. The next
+# build compares md5s against it to only rewrite the slots whose contents
+# changed, wherever the RWAV is read from now (ModifiedRwavs is rewritten
+# from the BRWSD before every build).
+BRWSD_LAYOUT_VERSION = 2
+
+def _file_signature(path):
+	stat = os.stat(path)
+	return [stat.st_size, stat.st_mtime_ns]
+
+def _layout_path(output_file):
+	return os.path.splitext(output_file)[0] + "_layout.json"
+
+def load_brwsd_layout(output_file):
+	path = _layout_path(output_file)
+	if os.path.isfile(path):
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				layout = json.load(f)
+			if layout.get("version") == BRWSD_LAYOUT_VERSION:
+				return layout
+		except (OSError, ValueError) as e:
+			print(f"[WARN] Could not read BRWSD layout {path}: {e}")
+	return None
+
+def save_brwsd_layout(output_file, layout):
+	path = _layout_path(output_file)
+	temp_path = path + "_temp"
+	with open(temp_path, "w", encoding="utf-8") as f:
+		json.dump(layout, f, separators=(",", ":"))
+	os.replace(temp_path, path)
+
+def _add_entry_hashes(entries, old_layout):
+	"""Appends the md5 of each entry's RWAV, reusing old_layout's for files unchanged since."""
+	known = {tuple(entry[:4]): entry[4] for entry in old_layout["entries"]} if old_layout else {}
+	for entry in entries:
+		digest = known.get(tuple(entry))
+		if digest is None:
+			with open(entry[1], 'rb') as f:
+				digest = content_hash(f.read())
+		entry.append(digest)
+
+def _current_slots(output_file, old_layout, layout, prefix_file):
+	"""[(size, md5)] of the RWAV slots in output_file as it is now, or None if it can't be updated in place.
+
+	Taken from old_layout while the file is still the one it describes.
+	Otherwise (e.g. the BRWSD was saved from BrawlCrate) they are read from
+	the file's own TABL, as long as it is still prefix_file followed by an
+	RWAR whose payloads sit back to back from data_start.
+	"""
+	if not os.path.isfile(output_file):
+		return None
+
+	if (
+		old_layout
+		and old_layout["prefix"] == layout["prefix"]
+		and old_layout["data_start"] == layout["data_start"]
+		and _file_signature(output_file) == old_layout.get("brwsd")
+	):
+		return [(entry[2], entry[4]) for entry in old_layout["entries"]]
+
+	prefix = b''
+	if prefix_file:
+		with open(prefix_file, 'rb') as f:
+			prefix = f.read()
+
+	with open(output_file, 'rb') as f:
+		data = f.read()
+	if not data.startswith(prefix):
+		return None
+
+	table = parse_rwar_table(data, len(prefix))
+	if table is None:
+		return None
+
+	slots = []
+	position = layout["data_start"]
+	with memoryview(data) as view:
+		for relative, size in table:
+			if len(prefix) + relative != position:
+				return None
+			slots.append((size, content_hash(view[position:position + size])))
+			position += size
+
+	return slots if position == len(data) else None
+
+def _update_brwsd_in_place(output_file, old_layout, layout, header, prefix_file=None):
+	"""Rewrites only the slots whose contents changed. Returns False if a full rebuild is needed.
+
+	RWAVs that kept their size are overwritten in their slot; from the first
+	one whose size changed, everything after it is rewritten and the file
+	is cut to its new length.
+	"""
+	entries = layout["entries"]
+	slots = _current_slots(output_file, old_layout, layout, prefix_file)
+	if slots is None or len(slots) != len(entries):
+		return False  # RWAVs added or removed, the TABL changes size
+
+	first_shifted = next(
+		(i for i, ((size, _), entry) in enumerate(zip(slots, entries)) if size != entry[2]),
+		len(entries)
+	)
+
+	# Until every write has gone through, the file matches neither layout;
+	# without one the next build reads the slots back from the file
+	layout_path = _layout_path(output_file)
+	if os.path.isfile(layout_path):
+		os.remove(layout_path)
+
+	rewritten = 0
+	with open(output_file, 'r+b') as brwsd_file:
+		# Sizes and offsets in the header may have changed, its length can't have
+		brwsd_file.seek(layout["data_start"] - len(header))
+		brwsd_file.write(header)
+
+		position = layout["data_start"]
+		for (_, digest), entry in zip(slots[:first_shifted], entries):
+			if digest != entry[4]:
+				brwsd_file.seek(position)
+				_append_file(brwsd_file, entry[1])
+				rewritten += 1
+			position += entry[2]
+
+		if first_shifted < len(entries):
+			brwsd_file.seek(position)
+			for entry in entries[first_shifted:]:
+				_append_file(brwsd_file, entry[1])
+			rewritten += len(entries) - first_shifted
+			brwsd_file.truncate(position + sum(entry[2] for entry in entries[first_shifted:]))
+
+	print(f"Rewrote {rewritten} of {len(entries)} RWAV(s) in place")
+	return True
+
+def combine_rwav_files_to_brwsd(rwav_folder, mod_folder, output_file, prefix_file=None, incremental=True, plan=None):
 	"""Combines RWAV files, using modified versions from mod_folder if available.
-	Sort order matches _list_rwavs_in_build_order(): natural filename order.
+	Order, sizes and offsets come from plan (plan_brwsd_build, made here if not given).
+
+	The file is written in one forward pass: prefix_file (BaseBlankFile.brwsd)
+	if given, then the RWAR header, TABL, DATA and the RWAV payloads. With
+	incremental, an existing output from the last build is updated in place
+	instead (see _update_brwsd_in_place).
 	"""
-	rwav_files = [
-		f for f in os.listdir(rwav_folder)
-		if os.path.isfile(os.path.join(rwav_folder, f)) and f.lower().endswith(".rwav")
-	]
-	rwav_files.sort(key=_natural_key)
-
-	rwav_files_info = []
-	current_offset = 0x20
-	rwav_total_size = 0
-
-	# Calculate offsets and sizes
-	for rwav_file in rwav_files:
-		# Prefer modified version if it exists
-		modified_path = os.path.join(mod_folder, rwav_file)
-		original_path = os.path.join(rwav_folder, rwav_file)
-		file_path = modified_path if os.path.isfile(modified_path) else original_path
-
-		rwav_size = os.path.getsize(file_path)
-		rwav_files_info.append({
-			'name': rwav_file,
-			'offset': current_offset,
-			'size': rwav_size,
-			'path': file_path
-		})
-		current_offset += rwav_size
-		rwav_total_size += rwav_size
+	rwav_files_info = plan if plan is not None else plan_brwsd_build(rwav_folder, mod_folder)
 
-	rwav_total_size += 32
+	rwav_total_size = sum(rwav_info['size'] for rwav_info in rwav_files_info) + 32
 	tabl_size = 0x10 + len(rwav_files_info) * 12
 	data_offset = pad_to_multiple_of(0x40 + tabl_size, 16)
 
-	with open(output_file, 'wb') as brwsd_file:
-		# Write headers
-		write_rwar_header(brwsd_file, tabl_size, data_offset, rwav_total_size)
-		write_tabl_header(brwsd_file, rwav_files_info)
-		write_data_section(brwsd_file, rwav_total_size)
-
-		# Move to data offset
-		brwsd_file.seek(data_offset)
-
-		# Write RWAV data in the exact same order
-		for rwav_info in rwav_files_info:
-			with open(rwav_info['path'], 'rb') as f:
-				brwsd_file.write(f.read())
-
-	print(f"Created {output_file}")
+	# Everything before the payloads is small, so it's built in memory where
+	# the TABL padding is relative to the RWAR and not to the prefix
+	header = io.BytesIO()
+	write_rwar_header(header, tabl_size, data_offset, rwav_total_size)
+	write_tabl_header(header, rwav_files_info)
+	write_data_section(header, rwav_total_size)
+	header.write(b'\x00' * (data_offset - header.tell()))
+	header = header.getvalue()
+
+	old_layout = load_brwsd_layout(output_file)
+	prefix = _file_signature(prefix_file) if prefix_file else None
+	layout = {
+		"version": BRWSD_LAYOUT_VERSION,
+		"prefix": prefix,
+		"data_start": (prefix[0] if prefix else 0) + data_offset,
+		"entries": [[info['name'], info['path'], info['size'], info['mtime_ns']] for info in rwav_files_info],
+	}
+	_add_entry_hashes(layout["entries"], old_layout)
+
+	if incremental and _update_brwsd_in_place(output_file, old_layout, layout, header, prefix_file):
+		print(f"Updated {output_file}")
+	else:
+		temp_file = output_file + "_temp"
+		with open(temp_file, 'wb') as brwsd_file:
+			if prefix_file:
+				_append_file(brwsd_file, prefix_file)
+
+			brwsd_file.write(header)
+
+			# Write RWAV data in the exact same order
+			for rwav_info in rwav_files_info:
+				_append_file(brwsd_file, rwav_info['path'])
+
+		os.replace(temp_file, output_file)
+		print(f"Created {output_file}")
+
+	layout["brwsd"] = _file_signature(output_file)
+	save_brwsd_layout(output_file, layout)
 
 def _natural_key(s: str):
 	# Sort like: 1,2,10 instead of 1,10,2 (falls back gracefully)
 	return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", s)]
 
-def _list_rwavs_in_build_order(unmod_folder: str, mod_folder: str):
-	unmod_names = [
-		f for f in os.listdir(unmod_folder)
-		if os.path.isfile(os.path.join(unmod_folder, f)) and f.lower().endswith((".rwav", ".brwav", ".wav"))
-	]
-	unmod_names.sort(key=_natural_key)
+def _list_files(folder):
+	"""{name: DirEntry} for the .rwav files in folder (empty if it doesn't exist)."""
+	if not os.path.isdir(folder):
+		return {}
+	with os.scandir(folder) as entries:
+		return {
+			entry.name: entry
+			for entry in entries
+			if entry.name.lower().endswith(".rwav") and entry.is_file()
+		}
+
+def plan_brwsd_build(unmod_folder: str, mod_folder: str):
+	"""Lists the RWAVs going into the BRWSD in build order (natural filename order).
+
+	Each entry has the Audio[] index, name, the file it's read from (the
+	modified copy when there is one), its size and mtime, and its TABL offset.
+	The AudioMap and the BRWSD are both written from this one list.
+	"""
+	unmod_files = _list_files(unmod_folder)
+	mod_files = _list_files(mod_folder)
 
-	result = []
-	for i, name in enumerate(unmod_names):
-		mod_path = os.path.join(mod_folder, name)
-		unmod_path = os.path.join(unmod_folder, name)
+	names = sorted(unmod_files, key=_natural_key)
 
-		if os.path.isfile(mod_path):
-			used_path = mod_path
+	plan = []
+	offset = 0x20
+	for i, name in enumerate(names):
+		if name in mod_files:
+			entry = mod_files[name]
 			source = "Modified"
 		else:
-			used_path = unmod_path
+			entry = unmod_files[name]
 			source = "Unmodified"
 
-		result.append({
+		stat = entry.stat()
+		plan.append({
 			"index": i,
-			"used_path": used_path,
-			"display_name": name,
+			"name": name,
+			"path": entry.path,
 			"source": source,
+			"size": stat.st_size,
+			"mtime_ns": stat.st_mtime_ns,
+			"offset": offset,
 		})
+		offset += stat.st_size
 
-	return result
+	return plan
 
 def _write_audio_manifest_txt(manifest_path: str, build_list):
 	os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
 
 	with open(manifest_path, "w", encoding="utf-8") as f:
 		for entry in build_list:
-			f.write(f'Audio[{entry["index"]}]:{entry["display_name"]}\n')
+			f.write(f'Audio[{entry["index"]}]:{entry["name"]}\n')
 
 def build_brwsd_from_unmodified_rwavs(working_directory, project_folder, progress_ui=None, cancel_flag=None):
 	unmod_folder = os.path.join(working_directory, "Projects", project_folder, "UnmodifiedRwavsSD")
@@ -171,8 +353,8 @@ def build_brwsd_from_unmodified_rwavs(working_directory, project_folder, progres
 	if not os.path.exists(unmod_folder) or not os.path.exists(base_blank):
 		return
 
-	# Build + write the manifest BEFORE combining, so it matches the exact planned order
-	build_list = _list_rwavs_in_build_order(unmod_folder, mod_folder)
+	# One plan drives both the manifest and the BRWSD, so they can't disagree
+	build_list = plan_brwsd_build(unmod_folder, mod_folder)
 	_write_audio_manifest_txt(manifest_txt, build_list)
 
 	if progress_ui:
@@ -180,13 +362,7 @@ def build_brwsd_from_unmodified_rwavs(working_directory, project_folder, progres
 		progress_ui.progressBar.setMaximum(0)
 		QApplication.processEvents()
 
-	combine_rwav_files_to_brwsd(unmod_folder, mod_folder, output_brwsd)
-
-	if progress_ui:
-		progress_ui.generated_text.setText("Finalizing BRWSD file...")
-		QApplication.processEvents()
-
-	append_and_replace_base_blank(base_blank, output_brwsd)
+	combine_rwav_files_to_brwsd(unmod_folder, mod_folder, output_brwsd, prefix_file=base_blank, plan=build_list)
 
 	if progress_ui:
 		progress_ui.progressBar.setMaximum(100)
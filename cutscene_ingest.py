@@ -0,0 +1,183 @@
+import os
+import json
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from rwar_extract import open_brsar, _extract_rwars_from_buffer, remove_cataloged_duplicates
+from progress_reporter import as_reporter, FRAME_RATE
+from rwar_catalog import load_catalog, update_sources, restore_orphaned_duplicates, canonical_hashes
+from extraction_cache import file_sha256
+
+# Demo .brsar files are independent of each other, so each one is extracted
+# in its own worker process. Workers write the final flattened names
+# (<stem>_<id>_<count>.brwsd) straight into IndexesSD/IndexesHD and hand their
+# catalog entries back; the parent records them and deduplicates once.
+# Archives already kept in the folder are never written by the workers, so
+# that pass only has to settle duplicates between demos extracted together.
+#
+# A ledger next to the catalog remembers each demo's SHA-256 and the Index
+# files it produced, so later runs only copy and extract new or changed demos:
+#   {"Demo03_01.brsar": {"hash": ..., "files": ["Demo03_01_000_005.brwsd", ...]}}
+LEDGER_FILENAME = "cutscene_ledger.json"
+
+def find_brsar_files(src_dir):
+	brsar_files = []
+	for root, _, files in os.walk(src_dir):
+		for fn in files:
+			if fn.lower().endswith(".brsar"):
+				brsar_files.append(os.path.join(root, fn))
+	return brsar_files
+
+def load_ledger(folder):
+	path = os.path.join(folder, LEDGER_FILENAME)
+	if os.path.isfile(path):
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError) as e:
+			print(f"[WARN] Could not read cutscene ledger {path}: {e}")
+	return {}
+
+def save_ledger(folder, ledger):
+	path = os.path.join(folder, LEDGER_FILENAME)
+	temp_path = path + "_temp"
+	with open(temp_path, "w", encoding="utf-8") as f:
+		json.dump(ledger, f, indent=1)
+	os.replace(temp_path, path)
+
+def _outputs_intact(flat_out, files, duplicates):
+	"""True if every Index file a demo produced is on disk or was deduplicated away."""
+	return all(
+		name in duplicates or os.path.isfile(os.path.join(flat_out, name))
+		for name in files
+	)
+
+def _extract_demo_archive(brsar_path, output_folder, canonical):
+	"""Worker: extracts one demo brsar and returns its catalog archive list.
+
+	canonical ({hash: file name}) are the archives already kept in
+	output_folder; matching ones are cataloged as duplicates, not written.
+	"""
+	brsar_stem = os.path.splitext(os.path.basename(brsar_path))[0]
+	with open_brsar(brsar_path) as data:
+		return _extract_rwars_from_buffer(data, output_folder, canonical=canonical, name_prefix=brsar_stem)
+
+def ingest_cutscenes(working_directory, src_dir, demo_folder="demo", index_folder="IndexesSD",
+		max_workers=None, progress_ui=None, cancel_flag=None):
+	"""Copies every new or changed .brsar under src_dir into
+	ProgramData/<demo_folder> and extracts them into <index_folder>.
+
+	Demos whose hash matches the ledger and whose Index files are still there
+	are skipped. Returns a summary dict with copied/skipped/extracted/written
+	counts and errors.
+	"""
+	programdata_demo = os.path.join(working_directory, "ProgramData", demo_folder)
+	flat_out = os.path.join(working_directory, index_folder)
+	os.makedirs(programdata_demo, exist_ok=True)
+	os.makedirs(flat_out, exist_ok=True)
+
+	summary = {"copied": 0, "skipped": 0, "extracted": 0, "written": 0, "errors": [], "output": flat_out}
+
+	ledger = load_ledger(flat_out)
+	duplicates = {
+		archive["file"]
+		for entry in load_catalog(flat_out)["sources"].values()
+		for archive in entry["archives"]
+		if "duplicate_of" in archive
+	}
+
+	def is_current(name, file_hash):
+		record = ledger.get(name)
+		return bool(record) and record["hash"] == file_hash and _outputs_intact(flat_out, record["files"], duplicates)
+
+	# ---- COPY PHASE ----
+	pending = {}  # brsar name -> hash, for everything that needs extracting
+	for src_path in find_brsar_files(src_dir):
+		name = os.path.basename(src_path)
+		try:
+			file_hash = file_sha256(src_path)
+			dest_path = os.path.join(programdata_demo, name)
+			if is_current(name, file_hash) and os.path.isfile(dest_path):
+				summary["skipped"] += 1
+				continue
+
+			shutil.copy2(src_path, dest_path)
+			pending[name] = file_hash
+			summary["copied"] += 1
+		except Exception as e:
+			summary["errors"].append(f"Copy failed: {name} → {e}")
+
+	# Demos copied in earlier (e.g. before the ledger existed) that were never recorded
+	for name in sorted(os.listdir(programdata_demo)):
+		if name.lower().endswith(".brsar") and name not in pending and name not in ledger:
+			pending[name] = file_sha256(os.path.join(programdata_demo, name))
+
+	if not pending:
+		return summary
+
+	# Files from the previous extraction of a changed demo may not be rewritten
+	# under the same names (the RWAV count is part of the name)
+	for name in pending:
+		for old_file in ledger.get(name, {}).get("files", []):
+			old_path = os.path.join(flat_out, old_file)
+			if os.path.isfile(old_path):
+				os.remove(old_path)
+
+	# ---- PARALLEL EXTRACTION PHASE ----
+	brsar_paths = [os.path.join(programdata_demo, name) for name in sorted(pending)]
+	canonical = canonical_hashes(load_catalog(flat_out), flat_out)  # Files of changed demos are gone by now
+	results = []
+	workers = max_workers or min(len(brsar_paths), os.cpu_count() or 1)
+	with as_reporter(progress_ui, cancel_flag) as reporter:
+		# spawn, not fork: Qt and the progress ticker thread don't survive fork()
+		with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+			futures = {
+				executor.submit(_extract_demo_archive, path, flat_out, canonical): path
+				for path in brsar_paths
+			}
+
+			# Wakes up every frame even while a demo is still extracting, so
+			# the dialog keeps repainting and cancel is noticed
+			pending_futures = set(futures)
+			while pending_futures:
+				finished, pending_futures = wait(pending_futures, timeout=1 / FRAME_RATE, return_when=FIRST_COMPLETED)
+				for future in finished:
+					path = futures[future]
+					try:
+						archives = future.result()
+						results.append((path, archives))
+						summary["extracted"] += 1
+						summary["written"] += sum(1 for a in archives if "duplicate_of" not in a)
+					except Exception as e:
+						summary["errors"].append(f"Extract failed: {os.path.basename(path)} → {e}")
+					reporter.update(status=f"Extracted: {os.path.basename(path)}")
+
+				reporter.update(len(futures) - len(pending_futures), len(futures))
+
+				if reporter.cancelled:
+					print("Cutscene extraction cancelled by user.")
+					executor.shutdown(wait=True, cancel_futures=True)
+					break
+
+		# Record what the workers found, then drop duplicates across every archive in the folder
+		update_sources(flat_out, results)
+
+		reporter.update(message="Removing duplicate RWAR files...")
+
+		try:
+			# Archives that were duplicates of a replaced file need a copy of their own again
+			restore_orphaned_duplicates(flat_out)
+			removed = remove_cataloged_duplicates(flat_out)
+			produced = {a["file"] for _, archives in results for a in archives}
+			summary["written"] -= len(produced & removed.keys())
+		except Exception as e:
+			summary["errors"].append(f"Duplicate cleanup failed → {e}")
+
+	# Only demos that finished extracting are recorded, so a cancelled run picks up where it stopped
+	for path, archives in results:
+		name = os.path.basename(path)
+		ledger[name] = {"hash": pending[name], "files": [a["file"] for a in archives]}
+	save_ledger(flat_out, ledger)
+
+	return summary
@@ -0,0 +1,67 @@
+import os
+import hashlib
+from collections import defaultdict
+
+# Files are only hashed when another file has the same size, so folders of
+# mostly unique files cost one stat() each.
+_READ_SIZE = 1024 * 1024
+
+def fast_hash(path):
+	"""Streams a file through blake2b (much faster than md5 on 64-bit CPUs)."""
+	hasher = hashlib.blake2b(digest_size=16)
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(_READ_SIZE), b''):
+			hasher.update(chunk)
+	return hasher.hexdigest()
+
+def find_duplicates(folder, extension, cancel_flag=None, on_progress=None):
+	"""Finds files in folder that are byte-identical to an earlier one.
+
+	Files are visited in sorted order and the first of each identical set is
+	kept. Returns {duplicate name: kept name}, or None if cancelled.
+	on_progress(done, total, name) is called for each hashed file.
+	"""
+	names = sorted(f for f in os.listdir(folder) if f.lower().endswith(extension))
+
+	by_size = defaultdict(list)
+	for name in names:
+		path = os.path.join(folder, name)
+		if os.path.isfile(path):
+			by_size[os.path.getsize(path)].append(name)
+
+	collisions = [group for group in by_size.values() if len(group) > 1]
+	total = sum(len(group) for group in collisions)
+	done = 0
+
+	duplicates = {}
+	for group in collisions:
+		kept = {}
+		for name in group:
+			if cancel_flag and cancel_flag.get("cancelled"):
+				return None
+
+			digest = fast_hash(os.path.join(folder, name))
+			if digest in kept:
+				duplicates[name] = kept[digest]
+			else:
+				kept[digest] = name
+
+			done += 1
+			if on_progress:
+				on_progress(done, total, name)
+
+	return duplicates
+
+def delete_duplicates(folder, duplicates):
+	"""Removes the duplicate side of a find_duplicates() result.
+
+	Returns the mapping for the files that were actually removed.
+	"""
+	removed = {}
+	for name, kept in duplicates.items():
+		try:
+			os.remove(os.path.join(folder, name))
+			removed[name] = kept
+		except PermissionError:
+			print(f"Could not delete (locked): {name}")
+	return removed
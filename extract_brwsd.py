@@ -1,7 +1,9 @@
 import os
 import re
 import struct
-from PySide6.QtWidgets import QApplication  # type: ignore
+
+from brsar_parser import RWAR_MAGIC, RWAV_MAGIC, parse_rwar_table
+from progress_reporter import as_reporter
 
 _AUDIO_LINE_RE = re.compile(r'^\s*Audio\[(\d+)\]\s*:\s*(.+?)\s*$')
 
@@ -49,6 +51,39 @@ def load_audio_map(txt_path: str) -> list[str]:
 
 	return [index_to_name[i] for i in range(max_i + 1)]
 
+def _locate_rwar(data):
+	"""Offset of the RWAR in a project BRWSD, or -1.
+
+	brwsd_creator puts it right after the BaseBlankFile RWSD, whose size
+	field says where that is.
+	"""
+	if data[:4] == b'RWSD' and len(data) >= 12:
+		rwsd_size = struct.unpack_from(">I", data, 8)[0]
+		if data[rwsd_size:rwsd_size + 4] == RWAR_MAGIC:
+			return rwsd_size
+	return data.find(RWAR_MAGIC)
+
+def _rwav_slots(data):
+	"""Yields (offset, size) for every RWAV in the BRWSD, in order.
+
+	Comes straight from the RWAR's TABL, which has the exact size of each
+	slot. If that doesn't check out (e.g. the file was reorganized in
+	BrawlCrate), each RWAV is searched for after the end of the previous one
+	and size is None: the RWAV's own size field is all there is.
+	"""
+	rwar_offset = _locate_rwar(data)
+	table = parse_rwar_table(data, rwar_offset) if rwar_offset != -1 else None
+	if table is not None:
+		for relative, size in table:
+			yield rwar_offset + relative, size
+		return
+
+	offset = data.find(RWAV_MAGIC)
+	while offset != -1:
+		yield offset, None
+		size = struct.unpack_from(">I", data, offset + 8)[0] if offset + 12 <= len(data) else 0
+		offset = data.find(RWAV_MAGIC, offset + max(size, 4))
+
 def extract_rwavs(file_path, project_name, progress_ui=None, cancel_flag=None):
 	project_folder = os.path.join(file_path, "Projects", project_name)
 	brwsd_path = os.path.join(project_folder, "your_project.brwsd")
@@ -73,43 +108,38 @@ def extract_rwavs(file_path, project_name, progress_ui=None, cancel_flag=None):
 	with open(brwsd_path, "rb") as f:
 		data = f.read()
 
-	offset = 0
 	index = 0
 	total = len(mapped_names)
 
-	while offset < len(data) and index < total:
-		if cancel_flag and cancel_flag.get("cancelled"):
-			print("RWAV extraction cancelled.")
-			return
-
-		if data[offset:offset+4] == b'RWAV':
-			size_offset = offset + 8
-			if size_offset + 4 > len(data):
+	with as_reporter(progress_ui, cancel_flag) as reporter, memoryview(data) as view:
+		reporter.update(message="Extracting RWAVs")
+		for offset, size in _rwav_slots(data):
+			if index >= total:
 				break
 
-			size = struct.unpack(">I", data[size_offset:size_offset+4])[0]
+			if reporter.cancelled:
+				print("RWAV extraction cancelled.")
+				return
+
+			if size is None:
+				size_offset = offset + 8
+				if size_offset + 4 > len(data):
+					break
+				size = struct.unpack_from(">I", data, size_offset)[0]
+
 			if size <= 0 or offset + size > len(data):
 				print(f"[WARN] Bad RWAV size at offset 0x{offset:X}: {size}")
 				break
 
-			rwav_data = data[offset:offset+size]
-
 			output_filename = mapped_names[index]
 			out_path = os.path.join(mod_rwav_folder, output_filename)
 			os.makedirs(os.path.dirname(out_path), exist_ok=True)  # just in case names contain subfolders
 
 			with open(out_path, "wb") as out_f:
-				out_f.write(rwav_data)
+				out_f.write(view[offset:offset + size])
 
 			index += 1
-			offset += size
-		else:
-			offset += 1
-
-		if progress_ui:
-			progress_ui.progressBar.setValue(int((index / total) * 100))
-			progress_ui.generated_text.setText("Extracting RWAVs")
-			QApplication.processEvents()
+			reporter.update(index, total)
 
 	if index < total:
 		print(f"Warning: Only {index} RWAV(s) found, expected {total}")
@@ -0,0 +1,61 @@
+import os
+import sys
+import shutil
+import hashlib
+
+from rwar_catalog import load_catalog, content_hash
+
+# Extracted Index sets are cached per user (not per install) and keyed by the
+# SHA-256 of the brsar they came from, so supplying the same WZSound again,
+# or to a fresh install directory, doesn't repeat the extraction.
+
+def get_cache_root():
+	if sys.platform == "win32":
+		base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+		return os.path.join(base, "WZSoundPatcher", "Cache")
+
+	base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(base, "wzsound_patcher")
+
+def get_cache_folder(file_hash):
+	return os.path.join(get_cache_root(), file_hash)
+
+def file_sha256(file_path):
+	hasher = hashlib.sha256()
+	with open(file_path, 'rb') as f:
+		for chunk in iter(lambda: f.read(1024 * 1024), b''):
+			hasher.update(chunk)
+	return hasher.hexdigest()
+
+def is_cached(file_hash):
+	# The catalog is written last, so its presence means the extraction finished.
+	# Catalogs from an older version load empty and get redone.
+	return bool(load_catalog(get_cache_folder(file_hash))["sources"])
+
+def prepare_cache_folder(file_hash):
+	"""Returns an empty cache folder for file_hash, clearing any half-finished one."""
+	folder = get_cache_folder(file_hash)
+	if os.path.isdir(folder):
+		shutil.rmtree(folder)
+	os.makedirs(folder)
+	return folder
+
+def restore_cached_file(src, dst, expected_hash):
+	"""Copies a cached file to dst if it still hashes to expected_hash.
+
+	Always a real copy, never a link, so editing dst can't change the cache.
+	Returns False (with dst removed) when the cached file is missing or damaged.
+	"""
+	if os.path.exists(dst):
+		os.remove(dst)  # Also breaks hard links made by older versions
+	try:
+		with open(src, 'rb') as f:
+			data = f.read()
+	except OSError:
+		return False
+	if content_hash(data) != expected_hash:
+		return False
+
+	with open(dst, 'wb') as f:
+		f.write(data)
+	return True
@@ -0,0 +1,133 @@
+import os
+import json
+from difflib import SequenceMatcher
+
+from rwar_catalog import load_catalog, archives_by_file
+
+# Written to IndexesHD after lining its archives up against IndexesSD:
+#   {"version": 1,
+#    "sd": {"WZSound.brsar": [size, mtime_ns], ...}, "hd": {...},
+#    "archives": {"Index_013": [[sd_start, sd_end, hd_start], ...], ...}}
+# Each run says SD entries sd_start..sd_end (inclusive) are HD entries
+# hd_start onwards. HD entries that aren't in any run are HD-only extras.
+# The sd/hd signatures are the catalog sources the map was built from, so a
+# re-extraction of either side rebuilds it.
+INDEX_MAP_FILENAME = "sd_hd_index_map.json"
+INDEX_MAP_VERSION = 1
+
+# Hand-maintained HD-only extras, for archives the hashes can't line up
+HD_EXTRAS = {
+	"Index_013": [158, 192],
+	"Index_025": [159, 193],
+}
+
+# Open-ended run end for archives whose length isn't known
+LAST_ENTRY = 0xFFFFFFFF
+
+def archive_key(filename):
+	"""Index_013_352.brwsd -> Index_013, Demo03_01_025_621.brwsd -> Demo03_01_025."""
+	return os.path.splitext(filename)[0].rsplit("_", 1)[0]
+
+def extras_runs(points):
+	"""Runs for the old hardcoded shift: the points are skipped and everything after them moves up."""
+	runs = []
+	start = 0
+	for shift, point in enumerate(sorted(set(points))):
+		if start < point:
+			runs.append([start, point - 1, start + shift])
+		start = point + 1
+	runs.append([start, LAST_ENTRY, start + len(set(points))])
+	return runs
+
+def fallback_runs(key):
+	if key in HD_EXTRAS:
+		return extras_runs(HD_EXTRAS[key])
+	return [[0, LAST_ENTRY, 0]]
+
+def archive_runs(index_map, key):
+	"""Runs for one archive key, falling back to the hardcoded extras when it isn't mapped."""
+	runs = index_map.get(key)
+	return fallback_runs(key) if runs is None else runs
+
+def align_rwavs(sd_hashes, hd_hashes):
+	"""Lines up two archives' RWAV hash lists. Returns runs, or None if they can't be matched up."""
+	if sd_hashes == hd_hashes:
+		return [[0, len(sd_hashes) - 1, 0]] if sd_hashes else []
+
+	runs = []
+	matcher = SequenceMatcher(None, sd_hashes, hd_hashes, autojunk=False)
+	for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+		if tag == "equal" or (tag == "replace" and i2 - i1 == j2 - j1):
+			# Same length but different bytes is taken as re-encoded in place
+			if runs and runs[-1][1] + 1 == i1 and runs[-1][2] + (i1 - runs[-1][0]) == j1:
+				runs[-1][1] = i2 - 1
+			else:
+				runs.append([i1, i2 - 1, j1])
+		elif tag == "replace":
+			return None  # Can't tell which SD entry became which HD one
+		# "insert" is an HD-only extra, "delete" an SD entry HD doesn't have
+
+	return runs
+
+def _rwav_hashes_by_key(catalog):
+	hashes = {}
+	for filename, archive in sorted(archives_by_file(catalog).items()):
+		hashes.setdefault(archive_key(filename), [rwav[2] for rwav in archive["rwavs"]])
+	return hashes
+
+def _catalog_signature(catalog):
+	return {
+		name: [entry.get("size"), entry.get("mtime_ns")]
+		for name, entry in catalog["sources"].items()
+	}
+
+def build_index_map(sd_catalog, hd_catalog):
+	"""Maps every HD archive onto its SD counterpart by RWAV content hash."""
+	sd_hashes = _rwav_hashes_by_key(sd_catalog)
+	hd_hashes = _rwav_hashes_by_key(hd_catalog)
+
+	archives = {}
+	for key, hd_list in hd_hashes.items():
+		runs = align_rwavs(sd_hashes[key], hd_list) if key in sd_hashes else None
+		if runs is None:
+			print(f"Could not line up {key} between SD and HD, using the default mapping")
+			runs = fallback_runs(key)
+		archives[key] = runs
+
+	return archives
+
+def load_index_map(sd_folder, hd_folder):
+	"""Returns {archive key: runs}, rebuilding and saving the map when either catalog changed.
+
+	Returns {} when either folder has no catalog to build it from, so every
+	archive gets the fallback mapping.
+	"""
+	sd_catalog = load_catalog(sd_folder)
+	hd_catalog = load_catalog(hd_folder)
+	if not sd_catalog["sources"] or not hd_catalog["sources"]:
+		return {}
+
+	signature = {"sd": _catalog_signature(sd_catalog), "hd": _catalog_signature(hd_catalog)}
+
+	path = os.path.join(hd_folder, INDEX_MAP_FILENAME)
+	if os.path.isfile(path):
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				saved = json.load(f)
+			if (
+				saved.get("version") == INDEX_MAP_VERSION
+				and saved.get("sd") == signature["sd"]
+				and saved.get("hd") == signature["hd"]
+			):
+				return saved["archives"]
+		except (OSError, ValueError) as e:
+			print(f"[WARN] Could not read index map {path}: {e}")
+
+	archives = build_index_map(sd_catalog, hd_catalog)
+
+	temp_path = path + "_temp"
+	with open(temp_path, "w", encoding="utf-8") as f:
+		json.dump({"version": INDEX_MAP_VERSION, **signature, "archives": archives}, f, separators=(",", ":"))
+	os.replace(temp_path, path)
+
+	return archives
@@ -0,0 +1,68 @@
+from bisect import bisect_right
+
+# Instruction rules select audio entries as ranges ("24 - 66") that can cover
+# whole archives. IntervalSet keeps them as sorted, merged [start, end] pairs
+# (inclusive), so merging and shifting rules costs per range, not per entry.
+
+class IntervalSet:
+	def __init__(self, intervals=()):
+		self._starts = []
+		self._ends = []
+		for start, end in sorted(intervals):
+			if start > end:
+				continue
+			if self._ends and start <= self._ends[-1] + 1:
+				# Overlapping or touching the previous interval
+				self._ends[-1] = max(self._ends[-1], end)
+			else:
+				self._starts.append(start)
+				self._ends.append(end)
+
+	@classmethod
+	def parse(cls, values):
+		"""Builds a set from rule values: ints, "7", "24 - 66" or "24-66". Anything else is ignored."""
+		intervals = []
+		for value in values:
+			if isinstance(value, int):
+				intervals.append((value, value))
+			elif isinstance(value, str):
+				if '-' in value:
+					start, end = map(int, value.split('-'))
+				else:
+					start = end = int(value)
+				intervals.append((start, end))
+		return cls(intervals)
+
+	def intervals(self):
+		return list(zip(self._starts, self._ends))
+
+	def __contains__(self, value):
+		if not isinstance(value, int):
+			return False  # e.g. 'All'
+		i = bisect_right(self._starts, value) - 1
+		return i >= 0 and value <= self._ends[i]
+
+	def __len__(self):
+		return sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+
+	def __bool__(self):
+		return bool(self._starts)
+
+	def __eq__(self, other):
+		return isinstance(other, IntervalSet) and self.intervals() == other.intervals()
+
+	def __or__(self, other):
+		return IntervalSet(self.intervals() + other.intervals())
+
+	def __repr__(self):
+		return f"IntervalSet({self.intervals()})"
+
+	def to_rules(self):
+		"""Serializes back to rule values: "3" and "5 - 8"."""
+		rules = []
+		for start, end in zip(self._starts, self._ends):
+			if start == end:
+				rules.append(str(start))
+			else:
+				rules.append(f"{start} - {end}")
+		return rules
@@ -1,6 +1,11 @@
 import os
 import shutil
-from PySide6.QtWidgets import QApplication
+
+from progress_reporter import as_reporter
+from rwar_catalog import load_catalog, get_source_archives, rwav_offsets_in_source
+
+# Bytes of an RWAV header used to pick candidate offsets from the catalog
+_HEADER_KEY_SIZE = 32
 
 def create_patch_file(working_directory, project_name, too_big_list, exact_match_list, progress_ui=None, cancel_flag=None):
 	instructions = []
@@ -49,48 +54,59 @@ def create_patch_file(working_directory, project_name, too_big_list, exact_match
 		print("No unmodified RWAVs to search (after filtering too_big_list).")
 		return False
 
+	catalog = load_catalog(os.path.join(working_directory, "IndexesSD"))
+
 	# Progress total = (#targets * #chunks)
 	total_steps = len(target_files) * len(chunks)
 	done_steps = 0
 
-	for target_path in target_files:
-		if cancel_flag and cancel_flag.get('cancelled'):
-			print("Operation cancelled by user.")
-			return False
-
-		# Read brsar data once
-		try:
-			with open(target_path, "rb") as f:
-				target_data = f.read()
-		except Exception as e:
-			print(f"Failed to read target: {target_path} -> {e}")
-			continue
-
-		# Store relative path inside ProgramData so patch is portable
-		# e.g. "WZSound.brsar" or "demo\\CutsceneA.brsar"
-		target_rel = os.path.relpath(target_path, programdata_dir)
-
-		for filename, chunk in chunks:
-			if cancel_flag and cancel_flag.get('cancelled'):
+	with as_reporter(progress_ui, cancel_flag) as reporter:
+		for target_path in target_files:
+			if reporter.cancelled:
 				print("Operation cancelled by user.")
 				return False
 
-			start = 0
-			while True:
-				index = target_data.find(chunk, start)
-				if index == -1:
-					break
-				hex_index = f"{index:08X}"
-				instructions.append((target_rel, hex_index, filename))
-				start = index + 1
-
-			done_steps += 1
-			if progress_ui:
-				percent = int((done_steps / total_steps) * 100) if total_steps else 0
-				progress_ui.progressBar.setValue(percent)
-				if hasattr(progress_ui, "label_status"):
-					progress_ui.label_status.setText(f"Searching: {os.path.basename(target_path)} | {filename}")
-				QApplication.processEvents()
+			# Read brsar data once
+			try:
+				with open(target_path, "rb") as f:
+					target_data = f.read()
+			except Exception as e:
+				print(f"Failed to read target: {target_path} -> {e}")
+				continue
+
+			# Store relative path inside ProgramData so patch is portable
+			# e.g. "WZSound.brsar" or "demo\\CutsceneA.brsar"
+			target_rel = os.path.relpath(target_path, programdata_dir)
+
+			# With a catalog only the known RWAV headers need checking, keyed by their first bytes
+			archives = get_source_archives(catalog, target_path)
+			headers = None
+			if archives is not None:
+				headers = {}
+				for offset in rwav_offsets_in_source(archives):
+					headers.setdefault(target_data[offset:offset + _HEADER_KEY_SIZE], []).append(offset)
+
+			for filename, chunk in chunks:
+				if reporter.cancelled:
+					print("Operation cancelled by user.")
+					return False
+
+				if headers is not None and len(chunk) >= _HEADER_KEY_SIZE:
+					for index in headers.get(chunk[:_HEADER_KEY_SIZE], []):
+						if target_data[index:index + len(chunk)] == chunk:
+							instructions.append((target_rel, f"{index:08X}", filename))
+				else:
+					start = 0
+					while True:
+						index = target_data.find(chunk, start)
+						if index == -1:
+							break
+						hex_index = f"{index:08X}"
+						instructions.append((target_rel, hex_index, filename))
+						start = index + 1
+
+				done_steps += 1
+				reporter.update(done_steps, total_steps, status=f"Searching: {os.path.basename(target_path)} | {filename}")
 
 	# Sort: target then offset
 	instructions.sort(key=lambda x: (x[0].lower(), int(x[1], 16)))
@@ -110,7 +126,7 @@ def create_patch_file(working_directory, project_name, too_big_list, exact_match
 		mod_path = os.path.join(mod_folder, filename)
 		unmod_path = os.path.join(unmod_folder, filename)
 
-		if not os.path.isfile(mod_path) or not os.path.isfile(unmod_path):
+		if not filename.lower().endswith(".rwav") or not os.path.isfile(mod_path) or not os.path.isfile(unmod_path):
 			continue
 
 		if os.path.getsize(mod_path) < os.path.getsize(unmod_path):
@@ -1,6 +1,7 @@
 import os
 import shutil
-from PySide6.QtWidgets import QApplication
+
+from progress_reporter import as_reporter
 
 def apply_wzsound_patch(working_directory, project_name, progress_ui=None, cancel_flag=None):
 	# Base folders
@@ -86,50 +87,47 @@ def apply_wzsound_patch(working_directory, project_name, progress_ui=None, cance
 	processed = 0
 
 	# Apply patches per target file
-	for target_rel, patches in by_target.items():
-		if cancel_flag and cancel_flag.get("cancelled"):
-			print("[CANCELLED] Patch operation aborted by user.")
-			return False
-
-		target_brsar = target_map.get(target_rel)
-		if not target_brsar:
-			continue
-
-		# Sort by offset (nice/consistent)
-		patches.sort(key=lambda x: int(x[0], 16))
-
-		with open(target_brsar, "rb+") as brsar_file:
-			for offset_hex, rwav_filename in patches:
-				if cancel_flag and cancel_flag.get("cancelled"):
-					print("[CANCELLED] Patch operation aborted by user.")
-					return False
-
-				try:
-					offset = int(offset_hex, 16)
-				except ValueError:
-					continue
-
-				rwav_path = os.path.join(patch_folder, rwav_filename)
-				if not os.path.isfile(rwav_path):
-					print(f"[WARNING] RWAV file not found: {rwav_path}, skipping.")
-					continue
-
-				with open(rwav_path, "rb") as rwav_file:
-					rwav_data = rwav_file.read()
-
-				brsar_file.seek(offset)
-				brsar_file.write(rwav_data)
-
-				processed += 1
-				if progress_ui:
-					percent = int((processed / total_patches) * 100) if total_patches else 0
-					progress_ui.progressBar.setValue(percent)
-					if hasattr(progress_ui, "label_status"):
-						# show the target too
-						progress_ui.label_status.setText(
-							f"Patching {processed} of {total_patches}: {os.path.basename(target_rel)} | {rwav_filename}"
-						)
-					QApplication.processEvents()
+	with as_reporter(progress_ui, cancel_flag) as reporter:
+		for target_rel, patches in by_target.items():
+			if reporter.cancelled:
+				print("[CANCELLED] Patch operation aborted by user.")
+				return False
+
+			target_brsar = target_map.get(target_rel)
+			if not target_brsar:
+				continue
+
+			# Sort by offset (nice/consistent)
+			patches.sort(key=lambda x: int(x[0], 16))
+
+			with open(target_brsar, "rb+") as brsar_file:
+				for offset_hex, rwav_filename in patches:
+					if reporter.cancelled:
+						print("[CANCELLED] Patch operation aborted by user.")
+						return False
+
+					try:
+						offset = int(offset_hex, 16)
+					except ValueError:
+						continue
+
+					rwav_path = os.path.join(patch_folder, rwav_filename)
+					if not os.path.isfile(rwav_path):
+						print(f"[WARNING] RWAV file not found: {rwav_path}, skipping.")
+						continue
+
+					with open(rwav_path, "rb") as rwav_file:
+						rwav_data = rwav_file.read()
+
+					brsar_file.seek(offset)
+					brsar_file.write(rwav_data)
+
+					processed += 1
+					# show the target too
+					reporter.update(
+						processed, total_patches,
+						status=f"Patching {processed} of {total_patches}: {os.path.basename(target_rel)} | {rwav_filename}"
+					)
 
 	print(f"[SUCCESS] Patch applied. Output folder:\n{target_root}")
 	return True
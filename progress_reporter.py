@@ -0,0 +1,115 @@
+import threading
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QApplication
+
+# Core loops call reporter.update() once per item. That only stores the
+# latest values; a ticker thread looks at them FRAME_RATE times a second and,
+# when something changed, sends one coalesced update to the dialog through a
+# queued Qt signal. The loop itself only pumps the Qt event queue once per
+# frame (so the dialog repaints and its close button can cancel), instead of
+# once per item.
+FRAME_RATE = 30
+
+class _DialogBridge(QObject):
+	# percent (-1 = unchanged), status line, dialog message ("" = unchanged)
+	changed = Signal(int, str, str)
+
+	def __init__(self, progress_ui):
+		super().__init__()  # Created on the GUI thread, so emits from the ticker are queued
+		self.progress_ui = progress_ui
+		self.changed.connect(self.apply)
+
+	def apply(self, percent, status, message):
+		ui = self.progress_ui
+		if percent >= 0 and hasattr(ui, "progressBar"):
+			ui.progressBar.setValue(percent)
+		if status and hasattr(ui, "label_status"):
+			ui.label_status.setText(status)
+		if message and hasattr(ui, "generated_text"):
+			ui.generated_text.setText(message)
+
+class ProgressReporter:
+	"""Progress sink for the core modules. Use it as a context manager.
+
+	Without a progress_ui every call is a no-op apart from the cancel check,
+	so the same code runs from the CLI and from worker processes.
+	"""
+
+	def __init__(self, progress_ui=None, cancel_flag=None, frame_rate=FRAME_RATE):
+		self.cancel_flag = cancel_flag
+		self._bridge = _DialogBridge(progress_ui) if progress_ui is not None else None
+		self._interval = 1 / frame_rate
+
+		self._percent = -1
+		self._status = ""
+		self._message = ""
+		self._version = 0
+		self._sent = 0
+
+		self._pump_due = False
+		self._stop = threading.Event()
+		self._thread = None
+		self._users = 0
+
+	@property
+	def cancelled(self):
+		return bool(self.cancel_flag and self.cancel_flag.get("cancelled"))
+
+	def update(self, done=None, total=None, status=None, message=None):
+		"""Records progress (done out of total) and/or new status text. Cheap to call per item."""
+		if self._bridge is None:
+			return
+
+		if total:
+			self._percent = int((done / total) * 100)
+		if status is not None:
+			self._status = status
+		if message is not None:
+			self._message = message
+		self._version += 1
+
+		if self._pump_due:
+			self._pump_due = False
+			QApplication.processEvents()
+
+	def _post(self):
+		version = self._version
+		if version != self._sent:
+			self._sent = version
+			self._bridge.changed.emit(self._percent, self._status, self._message)
+
+	def _run(self):
+		while not self._stop.wait(self._interval):
+			self._post()
+			self._pump_due = True
+
+	def __enter__(self):
+		self._users += 1
+		if self._bridge is not None and self._thread is None:
+			self._stop.clear()
+			self._thread = threading.Thread(target=self._run, name="progress-ticker", daemon=True)
+			self._thread.start()
+		return self
+
+	def __exit__(self, *exc):
+		self._users -= 1
+		if self._users == 0:
+			self.close()
+
+	def close(self):
+		"""Stops the ticker and shows the final state."""
+		if self._thread is not None:
+			self._stop.set()
+			self._thread.join()
+			self._thread = None
+
+		if self._bridge is not None:
+			self._post()
+			QApplication.processEvents()
+
+def as_reporter(progress_ui=None, cancel_flag=None):
+	"""Wraps the legacy (progress_ui, cancel_flag) pair. Reporters are passed through as-is."""
+	if isinstance(progress_ui, ProgressReporter):
+		return progress_ui
+	return ProgressReporter(progress_ui, cancel_flag)
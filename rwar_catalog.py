@@ -0,0 +1,285 @@
+import os
+import json
+import hashlib
+
+from brsar_parser import list_rwavs
+
+# Sidecar written next to the Index_*.brwsd files by extract_rwar_files.
+# Layout:
+#   {"version": 2,
+#    "sources": {"WZSound.brsar": {"path": ..., "size": ..., "mtime_ns": ..., "virtual": false,
+#        "archives": [{"file": "Index_000_005.brwsd", "offset": ..., "size": ...,
+#                      "hash": ..., "table": true, "mtime_ns": ...,
+#                      "rwavs": [[offset, size_field, hash, size], ...]}]}}}
+# Archive offsets are absolute in the source brsar, RWAV offsets are relative
+# to the archive. "table" says the RWAVs came from the RWAR's TABL, so size
+# is exact; otherwise they were scanned for (see brsar_parser.list_rwavs).
+# Duplicate archives stay listed with "duplicate_of" set to the file that
+# was kept, since every copy is a patch location. "mtime_ns" is the Index
+# file as written; size and mtime_ns together say whether the entry still
+# describes the file on disk (archive_matches_file).
+CATALOG_FILENAME = "rwar_catalog.json"
+CATALOG_VERSION = 2
+
+# ProgramData/virtual_indexes.txt says whether IndexesSD/IndexesHD are kept
+# as an offset table into the brsar ("true") or written out as Index files
+VIRTUAL_INDEXES_FILENAME = "virtual_indexes.txt"
+
+def content_hash(data):
+	return hashlib.md5(data).hexdigest()
+
+def build_archive_entry(data, offset, size, filename=None):
+	"""Catalogs one RWAR living at data[offset:offset + size]."""
+	end = offset + size
+	entries, from_table = list_rwavs(data, offset, end)
+
+	rwavs = []
+	with memoryview(data) as view:
+		for rwav_offset, size_field, slice_size in entries:
+			start = offset + rwav_offset
+			digest = content_hash(view[start:start + slice_size]) if slice_size else ""
+			rwavs.append([rwav_offset, size_field, digest, slice_size])
+
+		archive_hash = content_hash(view[offset:end])
+
+	return {
+		"file": filename,
+		"offset": offset,
+		"size": size,
+		"hash": archive_hash,
+		"table": from_table,
+		"rwavs": rwavs,
+	}
+
+def source_signature(source_path):
+	stat = os.stat(source_path)
+	return {
+		"path": os.path.abspath(source_path),
+		"size": stat.st_size,
+		"mtime_ns": stat.st_mtime_ns,
+	}
+
+def load_catalog(folder):
+	path = os.path.join(folder, CATALOG_FILENAME)
+	if os.path.isfile(path):
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				catalog = json.load(f)
+			if catalog.get("version") == CATALOG_VERSION:
+				return catalog
+			print(f"Ignoring catalog with unknown version: {path}")
+		except (OSError, ValueError) as e:
+			print(f"[WARN] Could not read catalog {path}: {e}")
+
+	return {"version": CATALOG_VERSION, "sources": {}}
+
+def save_catalog(folder, catalog):
+	path = os.path.join(folder, CATALOG_FILENAME)
+	temp_path = path + "_temp"
+	with open(temp_path, "w", encoding="utf-8") as f:
+		json.dump(catalog, f, separators=(",", ":"))
+	os.replace(temp_path, path)
+
+def archive_matches_file(archive, path):
+	"""True if the archive entry still describes the Index file at path."""
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return False
+	return archive.get("size") == stat.st_size and archive.get("mtime_ns") == stat.st_mtime_ns
+
+def _stamp_archive(folder, archive):
+	"""Records the mtime of archive's Index file, or drops it when there is no file."""
+	path = os.path.join(folder, archive["file"])
+	if "duplicate_of" not in archive and os.path.isfile(path):
+		archive["mtime_ns"] = os.stat(path).st_mtime_ns
+	else:
+		archive.pop("mtime_ns", None)
+
+def update_source(folder, source_path, archives, virtual=False):
+	"""Replaces the catalog entry for source_path with a freshly extracted archive list.
+
+	virtual marks sources whose Index files were never written; their
+	archives are read straight out of the brsar instead.
+	"""
+	update_sources(folder, [(source_path, archives)], virtual)
+
+def update_sources(folder, results, virtual=False):
+	"""Batch form of update_source for a list of (source_path, archives) pairs."""
+	catalog = load_catalog(folder)
+	for source_path, archives in results:
+		entry = source_signature(source_path)
+		entry["virtual"] = virtual
+		entry["archives"] = archives
+		for archive in archives:
+			_stamp_archive(folder, archive)
+		catalog["sources"][os.path.basename(source_path)] = entry
+	save_catalog(folder, catalog)
+
+def get_source_archives(catalog, source_path):
+	"""Returns the archive list recorded for source_path, or None if it's missing or stale."""
+	entry = catalog["sources"].get(os.path.basename(source_path))
+	if not entry or not os.path.isfile(source_path):
+		return None
+
+	stat = os.stat(source_path)
+	if entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+		print(f"Catalog entry for {os.path.basename(source_path)} is stale, ignoring it")
+		return None
+
+	return entry["archives"]
+
+def _source_is_fresh(entry):
+	path = entry.get("path")
+	if not path or not os.path.isfile(path):
+		return False
+	stat = os.stat(path)
+	return entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+def list_virtual_archives(catalog):
+	"""Maps Index file name -> (source path, archive) for archives only present in a brsar.
+
+	Duplicates are left out, the same way they are never written to disk.
+	"""
+	virtual = {}
+	for entry in catalog["sources"].values():
+		if not entry.get("virtual") or not _source_is_fresh(entry):
+			continue
+
+		for archive in entry["archives"]:
+			if "duplicate_of" not in archive:
+				virtual[archive["file"]] = (entry["path"], archive)
+
+	return virtual
+
+def canonical_hashes(catalog, folder, exclude_source=None):
+	"""Maps archive hash -> file name for every kept (non-duplicate) archive in folder."""
+	exclude_name = os.path.basename(exclude_source) if exclude_source else None
+
+	canonical = {}
+	for source_name, entry in catalog["sources"].items():
+		if source_name == exclude_name:
+			continue
+
+		is_virtual = entry.get("virtual") and _source_is_fresh(entry)
+		for archive in entry["archives"]:
+			if "duplicate_of" in archive:
+				continue
+			if is_virtual or archive_matches_file(archive, os.path.join(folder, archive["file"])):
+				canonical.setdefault(archive["hash"], archive["file"])
+
+	return canonical
+
+def mark_duplicates(folder, duplicates):
+	"""Records {duplicate file: canonical file} pairs found after extraction."""
+	if not duplicates:
+		return
+
+	catalog = load_catalog(folder)
+	for entry in catalog["sources"].values():
+		for archive in entry["archives"]:
+			if archive["file"] in duplicates:
+				archive["duplicate_of"] = duplicates[archive["file"]]
+				archive.pop("mtime_ns", None)
+
+	save_catalog(folder, catalog)
+
+def read_archive(source_path, archive):
+	"""Reads one archive's bytes out of its source brsar."""
+	with open(source_path, "rb") as f:
+		f.seek(archive["offset"])
+		return f.read(archive["size"])
+
+def materialize_index_files(folder, names=None):
+	"""Writes virtual Index files to disk (e.g. to open them in BrawlCrate).
+
+	names limits which files are written; by default every virtual archive is.
+	Returns the list of files written.
+	"""
+	catalog = load_catalog(folder)
+	written = []
+	for file_name, (source_path, archive) in list_virtual_archives(catalog).items():
+		if names is not None and file_name not in names:
+			continue
+
+		output_path = os.path.join(folder, file_name)
+		if os.path.isfile(output_path):
+			continue
+
+		with open(output_path, "wb") as f:
+			f.write(read_archive(source_path, archive))
+		_stamp_archive(folder, archive)
+		written.append(file_name)
+
+	if written:
+		save_catalog(folder, catalog)
+	return written
+
+def read_virtual_indexes_flag(working_directory):
+	"""True when new extractions should keep their Index files virtual."""
+	path = os.path.join(working_directory, "ProgramData", VIRTUAL_INDEXES_FILENAME)
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			return f.read().strip().lower() == "true"
+	except OSError:
+		return False
+
+def write_virtual_indexes_flag(working_directory, value):
+	program_data_dir = os.path.join(working_directory, "ProgramData")
+	os.makedirs(program_data_dir, exist_ok=True)
+	with open(os.path.join(program_data_dir, VIRTUAL_INDEXES_FILENAME), "w", encoding="utf-8") as f:
+		f.write("true" if value else "false")
+
+def archives_by_file(catalog):
+	"""Maps Index file name -> archive entry across every source in the catalog."""
+	return {
+		archive["file"]: archive
+		for entry in catalog["sources"].values()
+		for archive in entry["archives"]
+	}
+
+def rwav_offsets_in_source(archives):
+	"""Absolute offsets of every cataloged RWAV header in the source brsar."""
+	return [
+		archive["offset"] + rwav[0]
+		for archive in archives
+		for rwav in archive["rwavs"]
+	]
+
+def restore_orphaned_duplicates(folder):
+	"""Gives duplicates whose kept copy is gone or changed (e.g. its demo was re-extracted) their own file again.
+
+	The bytes come from the source brsar, so nothing is re-extracted. Run a
+	dedup pass afterwards to pick the new canonical copies. Returns the
+	restored file names.
+	"""
+	catalog = load_catalog(folder)
+
+	kept = {}  # file name -> hash
+	for entry in catalog["sources"].values():
+		is_virtual = entry.get("virtual") and _source_is_fresh(entry)
+		for archive in entry["archives"]:
+			if "duplicate_of" not in archive and (is_virtual or archive_matches_file(archive, os.path.join(folder, archive["file"]))):
+				kept[archive["file"]] = archive["hash"]
+
+	restored = []
+	for source_name, entry in catalog["sources"].items():
+		for archive in entry["archives"]:
+			# Same name isn't enough, the kept file may have been rewritten with other contents
+			if "duplicate_of" not in archive or kept.get(archive["duplicate_of"]) == archive["hash"]:
+				continue
+
+			if not _source_is_fresh(entry):
+				print(f"[WARN] {archive['file']} lost its kept copy and {source_name} changed; re-extract it")
+				continue
+
+			if not entry.get("virtual"):
+				with open(os.path.join(folder, archive["file"]), "wb") as f:
+					f.write(read_archive(entry["path"], archive))
+			del archive["duplicate_of"]
+			_stamp_archive(folder, archive)
+			restored.append(archive["file"])
+
+	if restored:
+		save_catalog(folder, catalog)
+	return restored
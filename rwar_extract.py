@@ -1,108 +1,219 @@
 import os
-import struct
-import hashlib
+import mmap
+from contextlib import contextmanager
+
+from brsar_parser import locate_rwars
+from dedup import find_duplicates, delete_duplicates
+from extraction_cache import file_sha256, is_cached, get_cache_folder, prepare_cache_folder, restore_cached_file
+from progress_reporter import as_reporter
+from rwar_catalog import build_archive_entry, update_source, load_catalog, canonical_hashes, mark_duplicates, read_archive, archive_matches_file
+
+@contextmanager
+def open_brsar(input_file, use_mmap=True):
+	"""Yields a read-only buffer over the whole file.
+
+	With use_mmap the file is mapped instead of read, so slices handed to
+	write() come straight from the page cache without an extra copy.
+	"""
+	with open(input_file, "rb") as f:
+		if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+			# Empty files can't be mapped
+			yield f.read()
+			return
+
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			yield mm
 
-from PySide6.QtWidgets import QApplication
+def extract_rwar_files(input_file, output_filepath, target_folder="IndexesSD", progress_ui=None, cancel_flag=None, use_mmap=True, virtual=False, use_cache=False, file_hash=None, name_prefix="Index"):
+	"""Splits every RWAR out of a brsar into Index_XXX_YYY.brwsd files.
 
-def extract_rwar_files(input_file, output_filepath, target_folder="IndexesSD", progress_ui=None, cancel_flag=None):
+	With virtual=True no Index files are written: only the catalog is, and
+	readers pull the archives out of input_file through its offset table.
+
+	name_prefix replaces "Index" in the file names (cutscenes use their
+	brsar name, e.g. Demo03_01_025_621.brwsd).
+
+	With use_cache=True the result is served from the per-user extraction
+	cache keyed by the file's SHA-256 (file_hash, if the caller already has
+	it), extracting into the cache first when it isn't there yet.
+	"""
 	output_folder = os.path.join(output_filepath, target_folder)
 	os.makedirs(output_folder, exist_ok=True)
 
-	with open(input_file, "rb") as f:
-		data = f.read()
+	if use_cache:
+		file_hash = file_hash or file_sha256(input_file)
+		if name_prefix != "Index":
+			file_hash = f"{file_hash}_{name_prefix}"  # File names are part of what's cached
+
+		if not is_cached(file_hash):
+			cache_folder = prepare_cache_folder(file_hash)
+			with open_brsar(input_file, use_mmap) as data:
+				archives = _extract_rwars_from_buffer(data, cache_folder, progress_ui, cancel_flag, name_prefix=name_prefix)
+			if archives is None:
+				return
+			update_source(cache_folder, input_file, archives)
+		else:
+			print(f"Using cached extraction for {os.path.basename(input_file)} ({file_hash})")
 
-	# Count how many RWARs total (for progress bar)
-	total_rwars = data.count(b'RWAR')
-	if total_rwars == 0:
-		total_rwars = 1  # Avoid division by zero
+		_restore_from_cache(file_hash, input_file, output_folder, virtual)
+		return
 
-	index = 0
-	file_id = 0
-	total_found = 0
-	processed = 0
+	# Archives already kept in this folder by other sources (e.g. cutscenes),
+	# so exact duplicates of them are never written
+	canonical = canonical_hashes(load_catalog(output_folder), output_folder, exclude_source=input_file)
 
-	while index < len(data):
-		if cancel_flag and cancel_flag.get("cancelled"):
-			print("RWAR extraction cancelled by user.")
-			return
+	with open_brsar(input_file, use_mmap) as data:
+		archives = _extract_rwars_from_buffer(data, output_folder, progress_ui, cancel_flag, write_files=not virtual, canonical=canonical, name_prefix=name_prefix)
 
-		index = data.find(b'RWAR', index)
-		if index == -1:
-			break
-
-		size_offset = index + 8
-		if size_offset + 4 > len(data):
-			print(f"Reached end of file while reading size for RWAR at {index}")
-			break
-
-		file_size = struct.unpack(">I", data[size_offset:size_offset + 4])[0]
-		end_offset = index + file_size
-		if end_offset > len(data):
-			print(f"File size at {index} exceeds file bounds. Skipping.")
-			index += 4
-			continue
-
-		chunk = data[index:end_offset]
-		rwav_count = chunk.count(b'RWAV')
-
-		if rwav_count > 0:
-			filename = f"Index_{file_id:03}_{rwav_count:03}.brwsd"
-			output_path = os.path.join(output_folder, filename)
-			with open(output_path, "wb") as out_file:
-				out_file.write(chunk)
-			print(f"Extracted: {filename} with {rwav_count} RWAV(s)")
-			file_id += 1
-			total_found += 1
-		else:
-			print(f"Skipped RWAR at {index} (no RWAV found)")
+	if archives is None:
+		return
 
-		index = end_offset
-		processed += 1
+	# Record what was found (including duplicate -> canonical) so later stages don't have to rescan
+	update_source(output_folder, input_file, archives, virtual=virtual)
 
-		if progress_ui:
-			progress = int((processed / total_rwars) * 100)
-			progress_ui.progressBar.setValue(progress)
-			QApplication.processEvents()
+def _restore_from_cache(file_hash, input_file, output_folder, virtual=False):
+	cache_folder = get_cache_folder(file_hash)
+	cached_sources = list(load_catalog(cache_folder)["sources"].values())
 
-	# Reset progress before duplicate check
-	if progress_ui:
-		progress_ui.progressBar.setValue(0)
-		if hasattr(progress_ui, "generated_text"):
-			progress_ui.generated_text.setText("Removing duplicate RWAR files...")
-		QApplication.processEvents()
+	canonical = canonical_hashes(load_catalog(output_folder), output_folder, exclude_source=input_file)
 
-	remove_duplicate_files(output_folder, progress_ui, cancel_flag)
+	archives = []
+	for cached_archive in cached_sources[0]["archives"] if cached_sources else []:
+		archive = dict(cached_archive)
+		archive.pop("duplicate_of", None)
+		archives.append(archive)
 
-def remove_duplicate_files(folder, progress_ui=None, cancel_flag=None):
-	hash_map = {}
-	deleted = 0
+		if _claim_archive(archive, canonical, output_folder) and not virtual:
+			output_path = os.path.join(output_folder, archive["file"])
+			if not restore_cached_file(os.path.join(cache_folder, archive["file"]), output_path, archive["hash"]):
+				# The brsar hashed the same, so its bytes are still the right ones
+				print(f"Cached {archive['file']} is missing or damaged, reading it from {os.path.basename(input_file)}")
+				with open(output_path, 'wb') as f:
+					f.write(read_archive(input_file, archive))
 
-	all_files = [f for f in os.listdir(folder) if f.endswith(".brwsd")]
-	total = len(all_files)
-	processed = 0
+	# Cataloged against this input file, not the one the cache was made from
+	update_source(output_folder, input_file, archives, virtual=virtual)
 
-	for filename in all_files:
-		if cancel_flag and cancel_flag.get("cancelled"):
-			print("Duplicate cleanup cancelled by user.")
-			return
+def _claim_archive(archive, canonical, output_folder):
+	"""Decides whether archive gets its own file or is a duplicate of a kept one.
+
+	Updates canonical and archive["duplicate_of"]; returns True if the file
+	should be written.
+	"""
+	filename = archive["file"]
+
+	# A file of the same name is about to be replaced, so it can't be the canonical copy
+	for digest in [d for d, name in canonical.items() if name == filename]:
+		del canonical[digest]
+
+	if archive["hash"] in canonical:
+		# Exact duplicate: keep the numbering, skip the write
+		archive["duplicate_of"] = canonical[archive["hash"]]
+		output_path = os.path.join(output_folder, filename)
+		if os.path.isfile(output_path):
+			os.remove(output_path)  # Left over from an older extraction
+		print(f"Duplicate: {filename} matches {archive['duplicate_of']}")
+		return False
+
+	canonical[archive["hash"]] = filename
+	return True
 
-		full_path = os.path.join(folder, filename)
+def _extract_rwars_from_buffer(data, output_folder, progress_ui=None, cancel_flag=None, write_files=True, canonical=None, name_prefix="Index"):
+	# hash -> file name of the first copy of each archive
+	canonical = {} if canonical is None else canonical
 
-		with open(full_path, "rb") as f:
-			file_data = f.read()
-			file_hash = hashlib.md5(file_data).hexdigest()
+	# One walk of the BRSAR tables gives every RWAR (and the progress total)
+	rwars = locate_rwars(data)
+	total_rwars = len(rwars) or 1  # Avoid division by zero
 
+	file_id = 0
+	archives = []
+
+	with as_reporter(progress_ui, cancel_flag) as reporter:
+		for processed, (index, file_size) in enumerate(rwars, start=1):
+			if reporter.cancelled:
+				print("RWAR extraction cancelled by user.")
+				return None
+
+			end_offset = index + file_size
+			archive = build_archive_entry(data, index, file_size)
+			rwav_count = len(archive["rwavs"])
+
+			if rwav_count > 0:
+				filename = f"{name_prefix}_{file_id:03}_{rwav_count:03}.brwsd"
+				archive["file"] = filename
+				archives.append(archive)
+
+				if _claim_archive(archive, canonical, output_folder):
+					if write_files:
+						output_path = os.path.join(output_folder, filename)
+						if os.path.isfile(output_path):
+							os.remove(output_path)  # May be a hard link into the extraction cache
+						with open(output_path, "wb") as out_file, memoryview(data) as view:
+							# Written straight from the buffer, no intermediate bytes copy
+							out_file.write(view[index:end_offset])
+						print(f"Extracted: {filename} with {rwav_count} RWAV(s)")
+					else:
+						print(f"Cataloged: {filename} with {rwav_count} RWAV(s)")
+				file_id += 1
+			else:
+				print(f"Skipped RWAR at {index} (no RWAV found)")
+
+			reporter.update(processed, total_rwars)
+
+	return archives
+
+def remove_duplicate_files(folder, progress_ui=None, cancel_flag=None):
+	"""Deletes .brwsd files whose contents match an earlier one.
+
+	Returns {deleted file: kept file}, which is also recorded in the catalog.
+	"""
+	with as_reporter(progress_ui, cancel_flag) as reporter:
+		duplicates = find_duplicates(
+			folder, ".brwsd", reporter.cancel_flag,
+			lambda done, total, filename: reporter.update(done, total, status=f"Checking: {filename}")
+		)
+	if duplicates is None:
+		print("Duplicate cleanup cancelled by user.")
+		return {}
+
+	duplicates = delete_duplicates(folder, duplicates)
+	mark_duplicates(folder, duplicates)
+	return duplicates
+
+def remove_cataloged_duplicates(folder):
+	"""remove_duplicate_files using the catalog hashes instead of rereading every file.
+
+	Falls back to remove_duplicate_files when the folder holds Index files
+	the catalog doesn't know about.
+	"""
+	catalog = load_catalog(folder)
+	on_disk = {f for f in os.listdir(folder) if f.endswith(".brwsd")}
+
+	kept = {}
+	for entry in catalog["sources"].values():
+		is_virtual = entry.get("virtual") and os.path.isfile(entry.get("path", ""))
+		for archive in entry["archives"]:
+			if "duplicate_of" not in archive and (
+				is_virtual or archive_matches_file(archive, os.path.join(folder, archive["file"]))
+			):
+				kept[archive["file"]] = archive
+
+	if on_disk - kept.keys():
+		return remove_duplicate_files(folder)
+
+	hash_map = {}
+	duplicates = {}
+	for filename in sorted(kept):
+		file_hash = kept[filename]["hash"]
 		if file_hash in hash_map:
-			os.remove(full_path)
-			deleted += 1
+			duplicates[filename] = hash_map[file_hash]
 		else:
 			hash_map[file_hash] = filename
 
-		processed += 1
-		if progress_ui:
-			percent = int((processed / total) * 100)
-			progress_ui.progressBar.setValue(percent)
-			if hasattr(progress_ui, "label_status"):
-				progress_ui.label_status.setText(f"Checking: {filename}")
-			QApplication.processEvents()
+	for filename in duplicates:
+		if filename in on_disk:
+			os.remove(os.path.join(folder, filename))
 
+	mark_duplicates(folder, duplicates)
+	return duplicates
@@ -1,57 +1,66 @@
 import os
+import json
 import struct
 import yaml
 import time
+import multiprocessing
 from collections import defaultdict
-import hashlib
-
-from PySide6.QtWidgets import QApplication
-
-def delete_duplicate_rwavs(output_folder, progress_ui=None, cancel_flag=None):
-    seen = {}
-    duplicates_to_delete = []
-    all_files = [f for f in os.listdir(output_folder) if f.endswith(".rwav")]
-    total = len(all_files)
-    processed = 0
-    removed = 0
-
-    for filename in all_files:
-        if cancel_flag and cancel_flag.get("cancelled"):
-            print("Duplicate cleanup cancelled by user.")
-            return
-
-        file_path = os.path.join(output_folder, filename)
-        with open(file_path, 'rb') as f:
-            data = f.read()
-            hash_digest = hashlib.md5(data).hexdigest()
-
-            if hash_digest in seen:
-                duplicates_to_delete.append(file_path)
-            else:
-                seen[hash_digest] = filename
-
-        processed += 1
-        if progress_ui:
-            percent = int((processed / total) * 100)
-            progress_ui.progressBar.setValue(percent)
-            if hasattr(progress_ui, "label_status"):
-                progress_ui.label_status.setText(f"Checking for duplicates: {filename}")
-            QApplication.processEvents()
-
-    for file_path in duplicates_to_delete:
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from brsar_parser import list_rwavs
+from hd_index_map import load_index_map, archive_runs, archive_key
+from interval_set import IntervalSet
+from progress_reporter import as_reporter, FRAME_RATE
+from rwar_catalog import load_catalog, archives_by_file, list_virtual_archives, read_archive, content_hash, archive_matches_file
+
+# Written next to the extracted RWAVs:
+#   {"files": {"Audio_006_001.rwav": [md5, size, mtime_ns], ...},
+#    "aliases": {"Audio_025_004.rwav": "Audio_013_004.rwav", ...}}
+# files are the RWAVs on disk after the last run, so the next one only
+# rewrites what changed and removes what's gone. size and mtime_ns are the
+# file as written, so one edited since (even to the same size) is rewritten.
+# aliases are RWAVs that were byte-identical to an earlier one (in sorted
+# name order) and never written.
+RWAV_MANIFEST_FILENAME = "rwav_manifest.json"
+
+def load_rwav_manifest(folder):
+    path = os.path.join(folder, RWAV_MANIFEST_FILENAME)
+    if os.path.isfile(path):
         try:
-            os.remove(file_path)
-            removed += 1
-        except PermissionError:
-            print(f"Could not delete (locked): {os.path.basename(file_path)}")
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if "files" in manifest:
+                return manifest
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read RWAV manifest {path}: {e}")
+    return {"files": {}, "aliases": {}}
+
+def _manifest_entry(folder, name, digest):
+    """[md5, size, mtime_ns] for an RWAV as it is on disk now."""
+    stat = os.stat(os.path.join(folder, name))
+    return [digest, stat.st_size, stat.st_mtime_ns]
+
+def _is_unchanged(path, digest, entry):
+    """True if path is still the file the manifest entry recorded with this content."""
+    if not entry or entry[0] != digest:
+        return False  # Also manifests from before sizes and mtimes were kept
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return [stat.st_size, stat.st_mtime_ns] == entry[1:]
+
+def save_rwav_manifest(folder, manifest):
+    path = os.path.join(folder, RWAV_MANIFEST_FILENAME)
+    temp_path = path + "_temp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
 
 def parse_instruction_value(value):
   if value == 'All':
     return 'All'
-  if '-' in value:
-    start, end = map(int, value.split('-'))
-    return list(range(start, end + 1))
-  return [int(value)]
+  return IntervalSet.parse([value])
 
 
 def normalize_rwav_payload(extracted_data, trailer_scan_window=0x100):
@@ -59,60 +68,193 @@ def normalize_rwav_payload(extracted_data, trailer_scan_window=0x100):
 
     - If a second RWAV header appears near the end, trim from that header onward.
     - Rewrite the RWAV size field to match the normalized byte length.
+
+    Works in place on a bytearray (and returns it); anything else is copied
+    into one first.
     """
-    if not extracted_data or len(extracted_data) < 12:
+    if not isinstance(extracted_data, bytearray):
+        extracted_data = bytearray(extracted_data)
+
+    if len(extracted_data) < 12:
         return extracted_data
 
     # Trim trailing embedded RWAV headers that indicate accidental overlap.
+    # Only the tail window is searched; a header further back isn't trimmed anyway.
     while True:
-        trailing_header_offset = extracted_data.rfind(b'RWAV', 4)
+        trailing_header_offset = extracted_data.rfind(b'RWAV', max(4, len(extracted_data) - trailer_scan_window))
         if trailing_header_offset == -1:
             break
 
-        bytes_from_tail = len(extracted_data) - trailing_header_offset
-        if bytes_from_tail > trailer_scan_window:
-            break
-
-        extracted_data = extracted_data[:trailing_header_offset]
+        del extracted_data[trailing_header_offset:]
         if len(extracted_data) < 12:
-            break
-
-    if len(extracted_data) < 12:
-        return extracted_data
+            return extracted_data
 
     # RWAV total size lives at offset 0x08 in big-endian format.
-    updated_size = len(extracted_data)
-    extracted_data = (
-        extracted_data[:8]
-        + struct.pack(">I", updated_size)
-        + extracted_data[12:]
-    )
+    struct.pack_into(">I", extracted_data, 8, len(extracted_data))
 
     return extracted_data
 
-def extract_rwav_from_instructions(
-    working_directory, project_folder, instructions, target_path, output="UnmodifiedRwavsSD",
-    progress_ui=None, cancel_flag=None
-):
+def _select_entries(rule_list, entry_count, runs=None):
+    """Maps archive entry -> audio number for the RWAVs the rules ask for.
+
+    Rules count audio entries from 0. runs (see hd_index_map) place those
+    numbers in an HD archive; without them entry and number are the same.
+    Also returns how many numbers were asked for.
+    """
+    if runs is None:
+        runs = [[0, entry_count - 1, 0]]
+
+    if 'All' in rule_list:
+        wanted = IntervalSet((sd_start, sd_end) for sd_start, sd_end, _ in runs)
+        requested = entry_count
+    else:
+        wanted = IntervalSet()
+        for rule in rule_list:
+            wanted |= parse_instruction_value(rule)
+        requested = len(wanted)
+
+    selected = {}
+    for sd_start, sd_end, hd_start in runs:
+        for start, end in wanted.intervals():
+            for number in range(max(start, sd_start), min(end, sd_end) + 1):
+                entry = number - sd_start + hd_start
+                if entry >= entry_count:
+                    break
+                selected[entry] = number
+
+    return selected, requested
+
+def _extract_archive_rwavs(index_key, rule_list, data, archive, output_folder, files, outputs, present, seen=None, runs=None):
+    """Extracts the requested RWAVs of one archive.
+
+    Adds {file name: hash} to outputs and the names now correct on disk to
+    present. Files whose hash matches files (the last run) and whose size
+    and mtime_ns on disk are still the recorded ones are left alone (see
+    _is_unchanged). With seen ({hash: name}), payloads already kept under
+    another name are skipped. Output names always use the rule's
+    numbering, also when runs place it elsewhere in the archive.
+    """
+    # Use the offsets recorded at RWAR extraction time when they still match the file
+    if archive and archive["size"] == len(data):
+        rwav_entries = [(rwav[0], rwav[3]) for rwav in archive["rwavs"]]
+        from_table = archive["table"]
+    else:
+        entries, from_table = list_rwavs(data)
+        rwav_entries = [(offset, size) for offset, _, size in entries]
+
+    if not rwav_entries:
+        return
+
+    selected, requested = _select_entries(rule_list, len(rwav_entries), runs)
+    view = memoryview(data)
+
+    for i in sorted(selected):
+        offset, rwav_size = rwav_entries[i]
+        audio_number = selected[i]
+
+        if rwav_size <= 0:
+            continue
+
+        if from_table:
+            extracted_data = view[offset:offset + rwav_size]  # Hashed and written without a copy
+        else:
+            # Scanned sizes can over-read into the next RWAV; trimmed in a single copy
+            extracted_data = normalize_rwav_payload(bytearray(view[offset:offset + rwav_size]))
+
+        if len(extracted_data) < 12:
+            continue
+
+        if index_key.lower().startswith("demo"):
+            # If we’re only extracting a single RWAV (common demo case),
+            # name it exactly: Demo03_01_001.rwav
+            if requested == 1 and len(rwav_entries) == 1:
+                out_filename = f"{index_key}.rwav"
+            else:
+                # Otherwise suffix to avoid overwrites if multiple RWAVs extracted
+                out_filename = f"{index_key}_{str(audio_number).zfill(3)}.rwav"
+        else:
+            index_number = index_key.split("_")[1].zfill(3)
+            out_filename = f"Audio_{index_number}_{str(audio_number).zfill(3)}.rwav"
+
+        out_path = os.path.join(output_folder, out_filename)
+        digest = content_hash(extracted_data)
+
+        # A name produced twice in one run is always rewritten, so the last one wins like before
+        rewritten = out_filename in outputs
+        outputs[out_filename] = digest
+
+        if seen is not None:
+            if seen.setdefault(digest, out_filename) != out_filename:
+                present.discard(out_filename)  # An earlier payload under this name isn't the one wanted now
+                continue  # Identical to an RWAV already kept this run
+
+        present.add(out_filename)
+        if not rewritten and _is_unchanged(out_path, digest, files.get(out_filename)):
+            continue
+
+        with open(out_path, 'wb') as out_f:
+            out_f.write(extracted_data)
+
+def _read_index_archive(full_path, virtual_source):
+    if os.path.isfile(full_path):
+        with open(full_path, 'rb') as f:
+            return f.read()
+    return read_archive(*virtual_source)
+
+def _extract_key_rwavs(index_key, rule_list, jobs, output_folder, files, dedup=False):
+    """Extracts one instruction key from every archive it matches. Also the process pool worker.
+
+    jobs are (index file path, virtual source or None, catalog entry or None, runs or None).
+    All archives of a key go through one call, in order, since their output
+    names can overlap. Returns (archives processed, {file name: hash}, names present).
+    """
+    outputs = {}
+    present = set()
+    seen = {} if dedup else None
+    for full_path, virtual_source, archive, runs in jobs:
+        data = _read_index_archive(full_path, virtual_source)
+        _extract_archive_rwavs(index_key, rule_list, data, archive, output_folder, files, outputs, present, seen, runs)
+
+    return len(jobs), outputs, present
+
+def _plan_extraction(working_directory, project_folder, instructions, target_path, output="UnmodifiedRwavsSD", dedup=False, index_map=None):
+    """Works out what one output folder needs: a task per instruction key, plus the last run's manifest."""
     index_folder = target_path
     output_folder = os.path.join(working_directory, "Projects", project_folder, output)
     os.makedirs(output_folder, exist_ok=True)
 
-    # Delete existing .rwav files
-    for f in os.listdir(output_folder):
-        if f.endswith(".rwav"):
-            os.remove(os.path.join(output_folder, f))
+    # Unchanged RWAVs from the last run are kept; only changed ones get rewritten
+    manifest = load_rwav_manifest(output_folder)
+
+    catalog = load_catalog(index_folder)
+    cataloged = archives_by_file(catalog)
+
+    # Archives only present in the catalog (virtual index mode) are read from their brsar
+    virtual_archives = list_virtual_archives(catalog)
+
+    # One listing of the folder, keyed by every "_"-separated prefix of each
+    # name, so Index_006 and Demo03_01_001 lookups don't rescan the folder
+    on_disk = [fn for fn in os.listdir(index_folder) if fn.lower().endswith(".brwsd")]
+    on_disk_names = set(on_disk)
+    files_by_prefix = defaultdict(list)
+    for fn in on_disk + [fn for fn in virtual_archives if fn not in on_disk_names]:
+        parts = fn.split("_")
+        for i in range(1, len(parts)):
+            files_by_prefix["_".join(parts[:i])].append(fn)
+
+    def trusted_archive(fn):
+        # The catalog only describes an Index file on disk while its size and mtime still match
+        archive = cataloged.get(fn)
+        if fn in on_disk_names:
+            return archive if archive and archive_matches_file(archive, os.path.join(index_folder, fn)) else None
+        return archive
 
     def get_matching_brwsd_files(index_key: str) -> list[str]:
         key_lower = index_key.lower()
 
         # Demo style: Demo03_01_001 -> match Demo03_01_001_*.brwsd
         if key_lower.startswith("demo"):
-            prefix = f"{index_key}_"
-            return [
-                fn for fn in os.listdir(index_folder)
-                if fn.startswith(prefix) and fn.lower().endswith(".brwsd")
-            ]
+            return files_by_prefix.get(index_key, [])
 
         # Old style: Index_006 -> match Index_006_*.brwsd
         if key_lower.startswith("index_"):
@@ -121,158 +263,258 @@ def extract_rwav_from_instructions(
             except Exception:
                 return []
 
-            prefix = f"Index_{index_number}_"
-            return [
-                fn for fn in os.listdir(index_folder)
-                if fn.startswith(prefix) and fn.lower().endswith(".brwsd")
-            ]
+            return files_by_prefix.get(f"Index_{index_number}", [])
 
         return []
 
-    # Count work items for progress
-    total_items = sum(len(get_matching_brwsd_files(k)) for k in instructions.keys())
-    if total_items == 0:
-        total_items = 1
-
-    processed = 0
-
+    tasks = []
     for index_key, rule_list in instructions.items():
-        matching_files = get_matching_brwsd_files(index_key)
-        if not matching_files:
-            continue
-
-        for file_name in matching_files:
-            if cancel_flag and cancel_flag.get("cancelled"):
-                print("Extraction cancelled by user.")
-                return
-
-            full_path = os.path.join(index_folder, file_name)
-            with open(full_path, 'rb') as f:
-                data = f.read()
-
-            rwav_offsets = []
-            pos = 0
-            while pos < len(data):
-                pos = data.find(b'RWAV', pos)
-                if pos == -1:
-                    break
-                rwav_offsets.append(pos)
-                pos += 4
-
-            if not rwav_offsets:
-                processed += 1
-                continue
-
-            extract_indices = set()
-            for rule in rule_list:
-                if rule == 'All':
-                    # NOTE: your original code uses 1..N here. Kept as-is.
-                    extract_indices = set(range(1, len(rwav_offsets) + 1))
-                    break
-                extract_indices.update(i + 1 for i in parse_instruction_value(rule))
-
-            for i, offset in enumerate(rwav_offsets):
-                audio_number = i + 1
-                if audio_number not in extract_indices:
-                    continue
-
-                size_offset = offset + 8
-                if size_offset + 4 > len(data):
-                    continue
+        jobs = [
+            (
+                os.path.join(index_folder, fn), virtual_archives.get(fn), trusted_archive(fn),
+                archive_runs(index_map, archive_key(fn)) if index_map is not None else None
+            )
+            for fn in get_matching_brwsd_files(index_key)
+        ]
+        if jobs:
+            tasks.append((index_key, rule_list, jobs))
+
+    # In output name order, so a serial run meets each payload under the
+    # name the dedup pass keeps (see _finish_extraction_plan)
+    tasks.sort(key=lambda task: _output_prefix(task[0]))
+
+    return {
+        "output_folder": output_folder,
+        "manifest": manifest,
+        "dedup": dedup,
+        "seen": {} if dedup else None,  # {hash: name} kept so far across keys, serial runs only
+        "tasks": tasks,
+        "results": [],  # (task, outputs, present)
+    }
 
-                rwav_size = struct.unpack(">I", data[size_offset:size_offset + 4])[0]
+def _output_prefix(index_key):
+    """Index_6 -> "Audio_006_", Demo03_01_001 -> "Demo03_01_001_", for ordering keys like their output names."""
+    if index_key.lower().startswith("demo"):
+        return f"{index_key}_"
+    return f"Audio_{index_key.split('_')[1].zfill(3)}_"
 
-                # RWAV chunks are 16-byte aligned; discard impossible low nibble.
-                if rwav_size & 0xF:
-                    rwav_size &= ~0xF
+# Below this many archives the spawn pool costs more than it saves: every
+# worker starts a fresh interpreter and re-imports everything, PySide6 included
+POOL_MIN_ARCHIVES = 200
 
-                if rwav_size <= 0:
-                    continue
+def _run_extraction_plans(plans, progress_ui=None, cancel_flag=None, parallel=True, max_workers=None):
+    """Runs the tasks of every plan in one go. Returns False if it was cancelled.
 
-                max_size_available = len(data) - offset
-                if rwav_size > max_size_available:
-                    rwav_size = max_size_available
+    Serially, payloads already kept under another name are never written,
+    whichever key they came from. In the process pool each key only sees
+    its own, so duplicates across keys are written and then removed by
+    _finish_extraction_plan.
+    """
+    work = [(plan, task) for plan in plans for task in plan["tasks"]]
 
-                extracted_data = data[offset:offset + rwav_size]
-                extracted_data = normalize_rwav_payload(extracted_data)
+    # Count work items for progress
+    total_items = sum(len(task[2]) for _, task in work) or 1
+    processed = 0
 
-                if len(extracted_data) < 12:
-                    continue
+    with as_reporter(progress_ui, cancel_flag) as reporter:
+        if not parallel or len(work) < 2 or total_items < POOL_MIN_ARCHIVES:
+            for plan, task in work:
+                index_key, rule_list, jobs = task
+                outputs, present = {}, set()
+                for full_path, virtual_source, archive, runs in jobs:
+                    if reporter.cancelled:
+                        break
+
+                    data = _read_index_archive(full_path, virtual_source)
+                    _extract_archive_rwavs(index_key, rule_list, data, archive, plan["output_folder"], plan["manifest"]["files"], outputs, present, plan["seen"], runs)
+                    processed += 1
+                    reporter.update(processed, total_items, status=f"Extracting: {os.path.basename(full_path)}")
+
+                plan["results"].append((task, outputs, present))
+                if reporter.cancelled:
+                    print("Extraction cancelled by user.")
+                    break
+        else:
+            # Keys never share output names, so each one can go to its own process
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = {
+                    executor.submit(_extract_key_rwavs, *task, plan["output_folder"], plan["manifest"]["files"], plan["dedup"]): (plan, task)
+                    for plan, task in work
+                }
+
+                # Wakes up every frame even while a key is still running, so
+                # the dialog keeps repainting and cancel is noticed
+                pending = set(futures)
+                while pending:
+                    finished, pending = wait(pending, timeout=1 / FRAME_RATE, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        plan, task = futures[future]
+                        done, outputs, present = future.result()
+                        plan["results"].append((task, outputs, present))
+                        processed += done
+                        reporter.update(status=f"Extracted: {task[0]}")
+                    reporter.update(processed, total_items)
+
+                    if reporter.cancelled:
+                        print("Extraction cancelled by user.")
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        break
+
+    return not reporter.cancelled
+
+def _finish_extraction_plan(plan, completed=True):
+    """Removes what the run no longer produces and saves the manifest."""
+    output_folder = plan["output_folder"]
+    results = plan["results"]
+
+    if not completed:
+        # Keep what's known to be on disk; stale files are left for the next full run
+        manifest = plan["manifest"]
+        for _, outputs, present in results:
+            manifest["files"].update(
+                (name, _manifest_entry(output_folder, name, outputs[name])) for name in present
+            )
+        save_rwav_manifest(output_folder, manifest)
+        return
+
+    outputs = {}
+    present = set()
+    for _, task_outputs, task_present in results:
+        outputs.update(task_outputs)
+        present |= task_present
+
+    # Identical payloads across keys: keep the first name in sorted order, like the old folder-wide pass
+    aliases = {}
+    if plan["dedup"]:
+        kept = {}
+        for name in sorted(outputs):
+            kept_name = kept.setdefault(outputs[name], name)
+            if kept_name != name:
+                aliases[name] = kept_name
+
+        # Only happens when a key's archives overwrite one of its own names, or a
+        # serial run met a payload under a later name first; redo those keys in full
+        for task, task_outputs, _ in results:
+            if any(name not in present for name in task_outputs if name not in aliases):
+                _, _, task_present = _extract_key_rwavs(*task, output_folder, {})
+                present |= task_present
+
+    # Anything extracted last time that the instructions no longer produce, or that is now an alias
+    for f in os.listdir(output_folder):
+        if f.endswith(".rwav") and (f not in outputs or f in aliases):
+            os.remove(os.path.join(output_folder, f))
 
-                if index_key.lower().startswith("demo"):
-                    # If we’re only extracting a single RWAV (common demo case),
-                    # name it exactly: Demo03_01_001.rwav
-                    if len(extract_indices) == 1 and len(rwav_offsets) == 1:
-                        out_filename = f"{index_key}.rwav"
-                    else:
-                        # Otherwise suffix to avoid overwrites if multiple RWAVs extracted
-                        out_filename = f"{index_key}_{str(audio_number - 1).zfill(3)}.rwav"
-                else:
-                    index_number = index_key.split("_")[1].zfill(3)
-                    out_filename = f"Audio_{index_number}_{str(audio_number - 1).zfill(3)}.rwav"
+    save_rwav_manifest(output_folder, {
+        "files": {
+            name: _manifest_entry(output_folder, name, digest)
+            for name, digest in outputs.items() if name not in aliases
+        },
+        "aliases": aliases,
+    })
 
-                out_path = os.path.join(output_folder, out_filename)
+def extract_rwav_from_instructions(
+    working_directory, project_folder, instructions, target_path, output="UnmodifiedRwavsSD",
+    progress_ui=None, cancel_flag=None, parallel=True, max_workers=None, dedup=False, index_map=None
+):
+    """Extracts the RWAVs the instructions ask for from the Index files in target_path.
 
-                with open(out_path, 'wb') as out_f:
-                    out_f.write(extracted_data)
+    With dedup, byte-identical RWAVs are kept once (under the first name in
+    sorted order) and the rest are recorded as aliases in the manifest. Run
+    serially, the duplicates are never written; in the process pool, those
+    across keys are written by their workers and removed afterwards.
 
-            processed += 1
-            if progress_ui:
-                progress = int((processed / total_items) * 100)
-                progress_ui.progressBar.setValue(progress)
-                if hasattr(progress_ui, "label_status"):
-                    progress_ui.label_status.setText(f"Extracting: {file_name}")
-                QApplication.processEvents()
+    index_map ({archive key: runs}, see hd_index_map) translates the
+    instructions' SD numbering for HD Index files.
+    """
+    plan = _plan_extraction(working_directory, project_folder, instructions, target_path, output, dedup, index_map)
+    completed = _run_extraction_plans([plan], progress_ui, cancel_flag, parallel, max_workers)
+    _finish_extraction_plan(plan, completed)
 
 def parse_range(value):
-    if isinstance(value, int):
-        return [value]
-    if isinstance(value, str):
-        if '-' in value:
-            start, end = map(int, value.split('-'))
-            return list(range(start, end + 1))
-        else:
-            return [int(value)]
-    return []
+    return IntervalSet.parse([value])
 
 def compress_range(nums):
+    """Turns an IntervalSet (or iterable of numbers) into rule strings like ["3", "5 - 8"]."""
     if 'All' in nums:
         return ['All']
-    nums = sorted(set(nums))
-    ranges = []
-    start = end = nums[0]
+    if not isinstance(nums, IntervalSet):
+        nums = IntervalSet((n, n) for n in nums)
+    return nums.to_rules()
 
-    for n in nums[1:]:
-        if n == end + 1:
-            end = n
-        else:
-            if start == end:
-                ranges.append(str(start))
-            else:
-                ranges.append(f"{start} - {end}")
-            start = end = n
+def sanitize_yaml_tabs(path):
+    """Replaces tabs with 4 spaces (YAML forbids tab indentation). Returns the fixed text.
 
-    # Append last
-    if start == end:
-        ranges.append(str(start))
-    else:
-        ranges.append(f"{start} - {end}")
+    The file is only rewritten when it actually contains tabs.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
 
-    return ranges
+    if '\t' in text:
+        text = text.replace('\t', '    ')
+        with open(path, 'w') as f:
+            f.write(text)
 
-def sanitize_yaml_tabs(path):
-    with open(path, 'r') as f:
-        lines = f.readlines()
+    return text
 
-    # Replace tabs with 4 spaces
-    lines = [line.replace('\t', '    ') for line in lines]
+# Parsed instruction files, keyed by path and only trusted while mtime and
+# size match: {path: {"mtime_ns": ..., "size": ..., "rules": {key: ranges}}}.
+# Kept in memory and in ProgramData so repeated builds skip YAML entirely.
+INSTRUCTION_CACHE_FILENAME = "instruction_cache.json"
+_instruction_caches = {}
 
-    with open(path, 'w') as f:
-        f.writelines(lines)
+# libyaml is several times faster when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
+def compile_instruction_file(path):
+    """Parses one instruction YAML into {key: compressed ranges} (or ['All'])."""
+    data = yaml.load(sanitize_yaml_tabs(path), Loader=_YAML_LOADER) or {}
+
+    rules = {}
+    for key, values in data.items():
+        if 'All' in values:
+            rules[key] = ['All']
+        else:
+            rules[key] = compress_range(IntervalSet.parse(values))
+    return rules
+
+def _load_instruction_cache(cache_path):
+    if cache_path not in _instruction_caches:
+        cache = {}
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Could not read instruction cache {cache_path}: {e}")
+        _instruction_caches[cache_path] = cache
+    return _instruction_caches[cache_path]
+
+def _save_instruction_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = cache_path + "_temp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, separators=(",", ":"))
+    os.replace(temp_path, cache_path)
+
+def load_instruction_rules(filepath, full_path):
+    """Returns the compiled rules for one instruction file, from the cache when it's unchanged."""
+    cache_path = os.path.join(filepath, "ProgramData", INSTRUCTION_CACHE_FILENAME)
+    cache = _load_instruction_cache(cache_path)
+
+    cache_key = os.path.normcase(os.path.abspath(full_path))
+    stat = os.stat(full_path)
+    entry = cache.get(cache_key)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["rules"]
+
+    rules = compile_instruction_file(full_path)
+    stat = os.stat(full_path)  # Sanitizing may have rewritten it
+    cache[cache_key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "rules": rules}
+    _save_instruction_cache(cache_path, cache)
+    return rules
 
 def merge_yaml_rules(filepath, filenames, allow_cutscenes=None):
-    merged = defaultdict(set)
+    merged = defaultdict(list)
 
     for raw_name in filenames:
         clean_name = raw_name.replace(" ", "_") + ".yaml"
@@ -282,24 +524,21 @@ def merge_yaml_rules(filepath, filenames, allow_cutscenes=None):
             print(f"Warning: {clean_name} not found at {full_path}")
             continue
 
-        sanitize_yaml_tabs(full_path)
-        with open(full_path, 'r') as f:
-            data = yaml.safe_load(f) or {}
-
-        for key, values in data.items():
+        for key, ranges in load_instruction_rules(filepath, full_path).items():
             if allow_cutscenes is False and str(key).strip().lower().startswith("demo"):
                 continue
 
-            if 'All' in values:
-                merged[key] = {'All'}
-            elif 'All' not in merged[key]:
-                for v in values:
-                    merged[key].update(parse_range(v))
+            merged[key].append(ranges)
 
-    # Compress into ranges
+    # Keys from a single file are already compressed; others are combined
     final_merged = {}
-    for key, values in merged.items():
-        final_merged[key] = compress_range(values)
+    for key, range_lists in merged.items():
+        if any(ranges == ['All'] for ranges in range_lists):
+            final_merged[key] = ['All']
+        elif len(range_lists) == 1:
+            final_merged[key] = range_lists[0]
+        else:
+            final_merged[key] = compress_range(IntervalSet.parse(r for ranges in range_lists for r in ranges))
 
     # Sort Index_# keys by number
     final_sorted = dict(sorted(
@@ -327,166 +566,60 @@ def read_project_instructions(filepath, folder_name):
         print(f"Error reading {instructions_path}: {e}")
         return []
 
-def setup_extraction(working_directory, current_project, allow_cutscenes=None, progress_ui=None, cancel_flag=None):
-    entries = read_project_instructions(working_directory, current_project)
-    instructions = merge_yaml_rules(working_directory, entries, allow_cutscenes)
-    index_folder = os.path.join(working_directory, "IndexesSD")
-    extract_rwav_from_instructions(working_directory, current_project, instructions, index_folder, progress_ui=progress_ui, cancel_flag=cancel_flag)
-
-    if progress_ui:
-        progress_ui.generated_text.setText("Removing duplicates...")
-        progress_ui.progressBar.setValue(0)
-        QApplication.processEvents()
-
-    output_folder = os.path.join(working_directory, "Projects", current_project, "UnmodifiedRwavsSD")
-    delete_duplicate_rwavs(output_folder, progress_ui=progress_ui, cancel_flag=cancel_flag)
-
-def setup_extraction_converted(working_directory, current_project, allow_cutscenes=True, progress_ui=None, cancel_flag=None):
-    if progress_ui:
-        progress_ui.generated_text.setText("Reading patch instructions (Converted)...")
-        QApplication.processEvents()
-
-    entries = read_project_instructions(working_directory, current_project)
-
-    instructions = merge_yaml_rules(
-        working_directory,
-        entries,
-        allow_cutscenes=allow_cutscenes
-    )
-
-    if progress_ui:
-        progress_ui.generated_text.setText("Extracting RWAVs from Modified Indexes...")
-        progress_ui.progressBar.setValue(0)
-        QApplication.processEvents()
-
-    index_folder = os.path.join(working_directory, "Projects", current_project, "Indexes")
-    extract_rwav_from_instructions(
-        working_directory,
-        current_project,
-        instructions,
-        index_folder,
-        output="ModifiedRwavs",
-        progress_ui=progress_ui,
-        cancel_flag=cancel_flag
-    )
-
-    # Cleanup step
+def _remove_unmatched_modified(working_directory, current_project):
+    """Drops converted RWAVs that have no SD original to pair with."""
     unmodified_path = os.path.join(working_directory, "Projects", current_project, "UnmodifiedRwavsSD")
     modified_path = os.path.join(working_directory, "Projects", current_project, "ModifiedRwavs")
 
     try:
         unmodified_files = set(os.listdir(unmodified_path))
         for filename in os.listdir(modified_path):
-            if filename not in unmodified_files:
+            if filename.endswith(".rwav") and filename not in unmodified_files:
                 file_to_delete = os.path.join(modified_path, filename)
                 os.remove(file_to_delete)
     except Exception as e:
         print(f"[ERROR] During cleanup of ModifiedRwavs: {e}")
 
-    if progress_ui:
-        progress_ui.generated_text.setText("Converted extraction complete.")
-        progress_ui.progressBar.setValue(100)
-        QApplication.processEvents()
-
+def run_extraction(working_directory, current_project, targets=("sd",), allow_cutscenes=None, progress_ui=None, cancel_flag=None):
+    """Extracts the project's RWAVs for several targets in one scheduled run.
 
-def adjust_instructions_for_extras(instructions: dict) -> dict:
-    # Map of Index_XYZ to list of extra RWAVs to remove
-    extras = {
-        "Index_013": [158, 192],
-        "Index_025": [159, 193],
-    }
-
-    adjusted = {}
-
-    for key, ranges in instructions.items():
-        extra_list = extras.get(key, [])
-        if not extra_list:
-            adjusted[key] = ranges
-            continue
-
-        flattened = []
-
-        # Flatten all ranges into a list of integers
-        for r in ranges:
-            if isinstance(r, int):
-                flattened.append(r)
-            elif isinstance(r, str) and " - " in r:
-                start, end = map(int, r.split(" - "))
-                flattened.extend(range(start, end + 1))
-            else:
-                flattened.append(int(r))
-
-        flattened = sorted(flattened)
-        new_values = []
-
-        for i, val in enumerate(flattened):
-            # Skip if val is one of the extras
-            if val in extra_list:
-                continue
-
-            # Count how many extras came before this value
-            offset = sum(1 for e in extra_list if e <= val)
-            new_values.append(val + offset)
-
-        # Re-group into ranges
-        grouped = []
-        if new_values:
-            start = prev = new_values[0]
-            for val in new_values[1:]:
-                if val == prev + 1:
-                    prev = val
-                else:
-                    if start == prev:
-                        grouped.append(start)
-                    else:
-                        grouped.append(f"{start} - {prev}")
-                    start = prev = val
-            # Add final group
-            if start == prev:
-                grouped.append(start)
+    targets are any of "sd" (IndexesSD -> UnmodifiedRwavsSD), "hd"
+    (IndexesHD -> UnmodifiedRwavsHD) and "converted" (the project's own
+    Indexes -> ModifiedRwavs). The instructions are merged once and every
+    target's work shares one process pool. Returns False if cancelled.
+    """
+    with as_reporter(progress_ui, cancel_flag) as reporter:
+        reporter.update(message="Reading patch instructions...")
+        entries = read_project_instructions(working_directory, current_project)
+        instructions = merge_yaml_rules(working_directory, entries, allow_cutscenes)
+
+        plans = []
+        for target in targets:
+            if target == "sd":
+                index_folder = os.path.join(working_directory, "IndexesSD")
+                plans.append(_plan_extraction(working_directory, current_project, instructions, index_folder, "UnmodifiedRwavsSD", dedup=True))
+            elif target == "hd":
+                index_folder = os.path.join(working_directory, "IndexesHD")
+                # Where each SD audio number sits in the HD archives, worked out once from the RWAV hashes
+                index_map = load_index_map(os.path.join(working_directory, "IndexesSD"), index_folder)
+                plans.append(_plan_extraction(working_directory, current_project, instructions, index_folder, "UnmodifiedRwavsHD", dedup=True, index_map=index_map))
+            elif target == "converted":
+                index_folder = os.path.join(working_directory, "Projects", current_project, "Indexes")
+                plans.append(_plan_extraction(working_directory, current_project, instructions, index_folder, "ModifiedRwavs"))
             else:
-                grouped.append(f"{start} - {prev}")
+                raise ValueError(f"Unknown extraction target: {target}")
 
-        adjusted[key] = grouped
+        reporter.update(0, 1, message="Extracting RWAV files...")
+        completed = _run_extraction_plans(plans, reporter)
 
-    return adjusted
+    for plan in plans:
+        _finish_extraction_plan(plan, completed)
 
-def setup_extraction_HD(working_directory, current_project, allow_cutscenes=True, progress_ui=None, cancel_flag=None):
-    entries = read_project_instructions(working_directory, current_project)
+    # Needs the SD side finished first
+    if completed and "converted" in targets:
+        _remove_unmatched_modified(working_directory, current_project)
 
-    if progress_ui and hasattr(progress_ui, "generated_text"):
-        progress_ui.generated_text.setText("Merging instructions for HD extraction...")
-        QApplication.processEvents()
+    return completed
 
-    instructions = merge_yaml_rules(
-        working_directory,
-        entries,
-        allow_cutscenes=allow_cutscenes
-    )
-
-    instructions = adjust_instructions_for_extras(instructions)
-
-    index_folder = os.path.join(working_directory, "IndexesHD")
-
-    if progress_ui and hasattr(progress_ui, "generated_text"):
-        progress_ui.generated_text.setText("Extracting RWAV files from HD indexes...")
-        QApplication.processEvents()
-
-    extract_rwav_from_instructions(
-        working_directory,
-        current_project,
-        instructions,
-        index_folder,
-        "UnmodifiedRwavsHD",
-        progress_ui=progress_ui,
-        cancel_flag=cancel_flag
-    )
-
-    if progress_ui and hasattr(progress_ui, "generated_text"):
-        progress_ui.generated_text.setText("Removing duplicate RWAV files...")
-        if hasattr(progress_ui, "progressBar"):
-            progress_ui.progressBar.setValue(0)
-        QApplication.processEvents()
-
-    output_folder = os.path.join(working_directory, "Projects", current_project, "UnmodifiedRwavsHD")
-    delete_duplicate_rwavs(output_folder, progress_ui=progress_ui, cancel_flag=cancel_flag)
+def setup_extraction(working_directory, current_project, allow_cutscenes=None, progress_ui=None, cancel_flag=None):
+    return run_extraction(working_directory, current_project, ("sd",), allow_cutscenes, progress_ui, cancel_flag)
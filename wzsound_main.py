@@ -2,11 +2,13 @@ import yaml
 import os
 import sys
 import shutil
+import multiprocessing
 
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QApplication, QDialog, QMessageBox
 from GUI.ui_form import Ui_WZSPI_MainWindow
 from rwar_extract import extract_rwar_files
+from rwar_catalog import read_virtual_indexes_flag
 from rwav_extract import setup_extraction
 from GUI.wzspi_mainwindow import WZSPI_MainWindow, MissingBrsarDialog  # Assuming this is your main window class
 
@@ -144,7 +146,13 @@ def check_wzsound_file(error_window):
 			QMessageBox.critical(error_window, "Missing File", "WZSound.brsar is required to continue.")
 			sys.exit(0)
 		else:
-			extract_rwar_files(wzsound_path, working_directory)
+			extract_rwar_files(
+				wzsound_path,
+				working_directory,
+				virtual=read_virtual_indexes_flag(working_directory),
+				use_cache=True,
+				file_hash=dialog.file_hash
+			)
 
 def get_icon_path() -> str | None:
 	candidates: list[str] = []
@@ -195,4 +203,5 @@ def main():
 	sys.exit(app.exec())
 
 if __name__ == "__main__":
+	multiprocessing.freeze_support()  # Cutscene ingestion and RWAV extraction use worker processes in the frozen exe
 	main()